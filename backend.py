@@ -1,13 +1,21 @@
 import json
 import os
 import csv
-import shutil
 import re
-import difflib
 import datetime
 import threading
 import logging
 from file_initializer import FileInitializer
+from led_layout import LedLayout
+from catalogue_store import open_catalogue_store
+from catalogue_index import (
+    CatalogueStats,
+    FuzzyMatchIndex,
+    KeyIndex,
+    LocationIndex,
+    SearchIndex,
+    SearchSession,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +33,10 @@ class Backend:
         "Bin 9": "Hardware",
         "Bin 10": "Other",
     }
+    CHANGE_EVENTS = {"insert": "added", "update": "updated", "delete": "removed"}
 
-    def __init__(self, ledControl, data_file=None, changelog_file=None, dialog_callbacks=None):
+    def __init__(self, ledControl, data_file=None, changelog_file=None, dialog_callbacks=None, storage_engine=None,
+                 led_layout=None):
         self.ledControl = ledControl
         self.dialog_callbacks = dialog_callbacks or {}
 
@@ -52,12 +62,31 @@ class Backend:
             changelog_file_rel = config.get("FILES", {}).get("CHANGELOG", "") or FileInitializer.DEFAULT_PATHS["CHANGELOG"]
             changelog_file = os.path.join(script_dir, changelog_file_rel) if not os.path.isabs(changelog_file_rel) else changelog_file_rel
 
+        if storage_engine is None:
+            storage_engine = config.get("FILES", {}).get("STORAGE_ENGINE", "")
+
         self.data_file = data_file
         self.changelog_file = changelog_file
+        self.storage_engine = storage_engine
 
         self.components = []
+        self.store = None
+        self.part_index = KeyIndex(self._part_key)
+        self.manufacturer_matcher = FuzzyMatchIndex()
+        self.manufacturer_index = KeyIndex(self._manufacturer_key, observer=self.manufacturer_matcher)
+        self.search_index = SearchIndex(self.normalize_part_number)
+        self.catalogue_version = 0
+        self.stats = CatalogueStats()
+        # main.py passes the layout it also hands to the LED controllers, so
+        # location codes and the strip the wall drives can never disagree.
+        self.led_layout = led_layout or LedLayout.from_config(config)
+        # Auto-assignment hands out exactly the vial slots the LED wall has
+        self.max_leds = self.led_layout.size
+        self.locations = LocationIndex(self.index_to_location, self.max_leds)
+        # Guards the indexes against searches running on worker threads.
+        self.catalogue_lock = threading.RLock()
+        self.change_listeners = []
         self.load_components()
-        self.max_leds = 300
         self.undo_stack = []
 
         logger.info("Using catalogue file: %s", self.data_file)
@@ -91,19 +120,169 @@ class Backend:
 
 
     def load_components(self):
-        try:
-            with open(self.data_file, "r") as file:
-                self.components = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.components = []
+        # Held while the store is swapped so a backup never sees a closed one.
+        with self.catalogue_lock:
+            previous = self.store
+            if previous is not None:
+                previous.compact(self.components)
+                previous.close()
+            self.store = open_catalogue_store(self.data_file, self.storage_engine)
+            if previous is not None and previous.data_file == self.data_file and previous.engine != self.store.engine:
+                # Same catalogue, new engine: whatever that engine already has on
+                # disk predates the switch, so carry the live catalogue over instead.
+                logger.info("Migrating catalogue from %s to %s storage", previous.engine, self.store.engine)
+                components = list(self.components)
+                self.store.write_snapshot(components)
+            else:
+                components = self.store.load()
+            self.components = components
+            self._rebuild_indexes()
+        self._publish_changes(None)
+
+    def _rebuild_indexes(self):
+        self.part_index.rebuild(self.components)
+        self.manufacturer_index.rebuild(self.components)
+        self.search_index.rebuild(self.components)
+        self.stats.rebuild(self.components)
+        self.locations.rebuild(self.components)
+        self.catalogue_version += 1
+
+    def _update_indexes(self, changes):
+        self.part_index.apply(changes, self.components)
+        self.manufacturer_index.apply(changes, self.components)
+        self.search_index.apply(changes, self.components)
+        self.stats.apply(changes, self.components)
+        self.locations.apply(changes, self.components)
+        self.catalogue_version += 1
+
+    def subscribe(self, callback):
+        """
+        Registers `callback(events)`, called after every catalogue change with
+        a list of events such as {"type": "added" | "updated" | "removed",
+        "component": ..., "index": ..., "previous": ...}. A reload or full
+        rewrite is reported as a single {"type": "bulk"} event.
+        """
+        if callback not in self.change_listeners:
+            self.change_listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.change_listeners:
+            self.change_listeners.remove(callback)
+
+    def _publish_changes(self, changes):
+        if changes is None:
+            events = [{"type": "bulk"}]
+        else:
+            events = []
+            for change in changes:
+                event = {"type": self.CHANGE_EVENTS[change["op"]], "component": change["component"]}
+                if "index" in change:
+                    event["index"] = change["index"]
+                if "previous" in change:
+                    event["previous"] = change["previous"]
+                events.append(event)
+        if not events:
+            return
+        for callback in list(self.change_listeners):
+            try:
+                callback(events)
+            except Exception:
+                logger.exception("Catalogue change listener failed.")
+
+    def _part_key(self, component):
+        return self.normalize_part_number(component.get("part_info", {}).get("part_number", ""))
+
+    def find_component(self, part_number):
+        """Returns the first component whose normalized part number matches, or None."""
+        return self.part_index.first(self.normalize_part_number(part_number))
+
+    def _find_exact_part(self, part_number):
+        # Exact (case-insensitive) match; the normalized bucket holds every candidate.
+        key = str(part_number).strip().lower()
+        for comp in self.part_index.get(self.normalize_part_number(key)):
+            if comp["part_info"]["part_number"].strip().lower() == key:
+                return comp
+        return None
 
-    def save_components(self):
-        self.last_activity = datetime.datetime.now()
-        with open(self.data_file, "w") as file:
-            json.dump(self.components, file, indent=4)
-            logger.info("Data saved to: %s", os.path.abspath(self.data_file))
+    def _raw_manufacturer_number(self, component):
+        return str(component.get("part_info", {}).get("manufacturer_number", "")).strip().lower()
+
+    def _manufacturer_key(self, component):
+        manufacturer = self._raw_manufacturer_number(component)
+        return self.normalize_part_number(manufacturer) if manufacturer else ""
+
+    def find_manufacturer_match(self, manufacturer_number, cutoff=0.8):
+        """
+        Looks up an existing component by manufacturer number, first exactly
+        (after normalizing) and then by similarity, with the same result as
+        difflib.get_close_matches(n=1, cutoff=cutoff).
+        Returns (component, matched_manufacturer_number, exact) or None.
+        """
+        manufacturer = str(manufacturer_number).strip().lower()
+        if not manufacturer:
+            return None
+        normalized = self.normalize_part_number(manufacturer)
+
+        exact = True
+        bucket = self.manufacturer_index.get(normalized)
+        if not bucket:
+            exact = False
+            suggestion = self.manufacturer_matcher.best_match(normalized, cutoff=cutoff)
+            if suggestion is None:
+                return None
+            bucket = self.manufacturer_index.get(suggestion)
+
+        # When several raw numbers normalize alike, the last one in the
+        # catalogue is reported and its first occurrence is used.
+        actual_match = self._raw_manufacturer_number(bucket[-1])
+        for comp in bucket:
+            if self._raw_manufacturer_number(comp) == actual_match:
+                return comp, actual_match, exact
+        return None
+
+    def _catalogue_store(self):
+        # data_file and storage_engine can be switched at runtime (test mode,
+        # settings); a store that has not loaded them falls back to a full rewrite.
+        engine = str(self.storage_engine or "").strip().lower() or "json"
+        if self.store is None or self.store.data_file != self.data_file or self.store.engine != engine:
+            if self.store is not None:
+                self.store.close()
+            self.store = open_catalogue_store(self.data_file, engine)
+        return self.store
+
+    def save_components(self, changes=None):
+        """
+        Persists the catalogue. `changes` is a list of change records such as
+        {"op": "insert" | "update" | "delete", "index": ..., "component": ...}
+        which are appended to the journal; without it the whole catalogue is
+        rewritten.
+        """
+        self.last_activity = datetime.datetime.now()
+        with self.catalogue_lock:
+            if changes is None:
+                self._rebuild_indexes()
+            else:
+                self._update_indexes(changes)
+            store = self._catalogue_store()
+            if changes is None:
+                store.write_snapshot(self.components)
+            else:
+                store.apply(changes, self.components)
+        logger.info("Data saved to: %s", os.path.abspath(self.data_file))
 
         self.log_change("Saved components file.")
+        self._publish_changes(changes)
+
+    def save_component(self, component):
+        """Persists an in-place change to a single catalogue component."""
+        self.save_components([{"op": "update", "component": component}])
+
+    def close(self):
+        """Folds any pending journal records into the catalogue snapshot."""
+        with self.catalogue_lock:
+            if self.store is not None:
+                self.store.compact(self.components)
+                self.store.close()
 
     def log_change(self, message):
         # Appends a timestamped log message to the changelog file.
@@ -116,33 +295,44 @@ class Backend:
         """
         Converts a 0-based index into a location code.
         For example, index 0 -> "1A", index 1 -> "1B", ... index 26 -> "2A", etc.
+        (with the default 26-column layout).
         """
-        row = index // 26 + 1
-        col = index % 26
-        return f"{row}{chr(col + ord('A'))}"
+        return self.led_layout.location_for_slot(index)
+
+    def set_led_layout(self, layout):
+        """Switch to a new grid layout; location codes for auto-assignment follow it."""
+        with self.catalogue_lock:
+            self.led_layout = layout
+            self.max_leds = layout.size
+            # Carry over slots held by a bulk check-in still in progress
+            reserved = self.locations.reserved_locations()
+            self.locations = LocationIndex(self.index_to_location, self.max_leds)
+            self.locations.rebuild(self.components, reserved)
 
     def get_assigned_locations(self):
         """
         Returns a set of all location codes already assigned to components.
         """
-        assigned = set()
-        for comp in self.components:
-            loc = comp["part_info"].get("location", "").strip().upper()
-            if loc:
-                assigned.add(loc)
-        return assigned
+        return self.locations.assigned_locations()
 
     def assign_location(self):
         """
         Finds the earliest free location code (based on LED index order) that is not
-        currently assigned. Returns the location code as a string (e.g., "1A").
+        currently assigned or reserved. Returns the location code as a string
+        (e.g., "1A"), or None when every location is taken.
+        """
+        return self.locations.allocate()
+
+    def reserve_locations(self, count):
+        """
+        Reserves up to `count` free locations for a batch check-in, in the order
+        assign_location would hand them out. A reservation is used up when a
+        component is added at that location; call release_locations for the rest.
         """
-        assigned = self.get_assigned_locations()
-        for i in range(self.max_leds):
-            candidate = self.index_to_location(i)
-            if candidate not in assigned:
-                return candidate
-        return None  # No free location available
+        return self.locations.reserve(count)
+
+    def release_locations(self, locations):
+        self.locations.release(locations)
 
     def get_bin_locations(self):
         return list(self.BIN_LOCATIONS)
@@ -201,46 +391,41 @@ class Backend:
         new_part_number = component["part_info"]["part_number"].strip().lower()
         new_count = int(component["part_info"].get("count", 0))
 
-        # Check the location. If it's empty or "N/A", assign a new location.
-        location = component["part_info"].get("location", "").strip()
-        if not location or location.upper() == "N/A":
-            auto_loc = self.assign_location()
-            if auto_loc is not None:
-                component["part_info"]["location"] = auto_loc
-            else:
-                component["part_info"]["location"] = "N/A"  # Or raise an error
+        with self.catalogue_lock:
+            # Check the location. If it's empty or "N/A", assign a new location.
+            location = component["part_info"].get("location", "").strip()
+            if not location or location.upper() == "N/A":
+                auto_loc = self.assign_location()
+                if auto_loc is not None:
+                    component["part_info"]["location"] = auto_loc
+                else:
+                    component["part_info"]["location"] = "N/A"  # Or raise an error
 
-        else:
-            #Check for duplicate locations
-            location = location.upper()
-            assigned = self.get_assigned_locations()
-            if location in assigned and "bin" not in location.lower():
-                # Location is already taken.
-                self._notify("error", "Location Error", f"Location {location} is already assigned to another component.")
-                raise Exception(f"Location {location} is already assigned to another component.")
+            else:
+                #Check for duplicate locations
+                location = location.upper()
+                if self.locations.is_assigned(location) and "bin" not in location.lower():
+                    # Location is already taken.
+                    self._notify("error", "Location Error", f"Location {location} is already assigned to another component.")
+                    raise Exception(f"Location {location} is already assigned to another component.")
         
-        # (Optional) Check for duplicates and update count if needed.
-        duplicate_index = None
-        for i, comp in enumerate(self.components):
-            existing_part = comp["part_info"]["part_number"].strip().lower()
-            if existing_part == new_part_number:
-                duplicate_index = i
-                break
-
-        if duplicate_index is not None:
-            existing_component = self.components[duplicate_index]
-            try:
-                existing_count = int(existing_component["part_info"].get("count", 0))
-            except ValueError:
-                existing_count = 0
-            updated_count = existing_count + new_count
-            existing_component["part_info"]["count"] = updated_count
-            self.components[duplicate_index] = existing_component
-        else:
-            # Insert new component at the beginning of the list
-            self.components.insert(0, component)
+            # (Optional) Check for duplicates and update count if needed.
+            existing_component = self._find_exact_part(new_part_number)
+
+            if existing_component is not None:
+                try:
+                    existing_count = int(existing_component["part_info"].get("count", 0))
+                except ValueError:
+                    existing_count = 0
+                updated_count = existing_count + new_count
+                existing_component["part_info"]["count"] = updated_count
+                changes = [{"op": "update", "component": existing_component}]
+            else:
+                # Insert new component at the beginning of the list
+                self.components.insert(0, component)
+                changes = [{"op": "insert", "index": 0, "component": component}]
 
-        self.save_components()
+            self.save_components(changes)
 
     def get_all_components(self):
         return self.components
@@ -262,69 +447,80 @@ class Backend:
         return availability
 
     def set_component_available(self, index):
-        if not (0 <= index < len(self.components)):
-            return False
+        with self.catalogue_lock:
+            if not (0 <= index < len(self.components)):
+                return False
 
-        component = self.components[index]
-        metadata = component.setdefault("metadata", {})
-        if str(metadata.get("in_use", "Available") or "Available") == "Available":
-            return False
+            component = self.components[index]
+            metadata = component.setdefault("metadata", {})
+            if str(metadata.get("in_use", "Available") or "Available") == "Available":
+                return False
 
-        metadata["in_use"] = "Available"
-        self.save_components()
+            metadata["in_use"] = "Available"
+            self.save_component(component)
         self.log_change(
             f"Forced component '{component.get('part_info', {}).get('part_number', 'Unknown')}' to Available."
         )
         return True
 
     def set_all_components_available(self):
-        changed = 0
-        for component in self.components:
-            metadata = component.setdefault("metadata", {})
-            if str(metadata.get("in_use", "Available") or "Available") != "Available":
-                metadata["in_use"] = "Available"
-                changed += 1
+        changes = []
+        with self.catalogue_lock:
+            for component in self.components:
+                metadata = component.setdefault("metadata", {})
+                if str(metadata.get("in_use", "Available") or "Available") != "Available":
+                    metadata["in_use"] = "Available"
+                    changes.append({"op": "update", "component": component})
 
-        if changed:
-            self.save_components()
+            changed = len(changes)
+            if changed:
+                self.save_components(changes)
             self.log_change(f"Forced {changed} components to Available.")
         return changed
 
-    def search_components(self, query):
-        query = query.lower()
-        normalized_query = self.normalize_part_number(query)
-
-        def match_any_field(comp_dict):
-            for value in comp_dict.values():
-                val_str = str(value).lower()
-                if query in val_str or normalized_query in self.normalize_part_number(val_str):
-                    return True
-            return False
-
-        return [
-            comp for comp in self.components
-            if match_any_field(comp["part_info"]) or match_any_field(comp["metadata"])
-        ]
+    def search_components(self, query):
+        """
+        Returns the components with a part_info or metadata value containing
+        `query` (case-insensitive, or after normalizing both), in catalogue order.
+        """
+        with self.catalogue_lock:
+            return self.search_index.search(query, self.components)
+
+    def search_session(self):
+        """
+        Returns a SearchSession for incremental searching (e.g. as the user
+        types). It reuses the previous results when the new query extends the
+        last one and the catalogue has not changed since.
+        """
+        return SearchSession(
+            self.search_index,
+            lambda: (self.components, self.catalogue_version),
+            lock=self.catalogue_lock,
+        )
 
     def edit_component(self, index, updated_component):
-        if 0 <= index < len(self.components):
-            old_part = self.components[index]["part_info"].get("part_number", "Unknown")
+        with self.catalogue_lock:
+            if not 0 <= index < len(self.components):
+                return
+            previous = self.components[index]
+            old_part = previous["part_info"].get("part_number", "Unknown")
             self.components[index] = updated_component
-            self.save_components()
-            self.log_change(f"Edited component at index {index} (Part Number: {old_part}).")
+            self.save_components([{"op": "update", "component": updated_component, "previous": previous}])
+        self.log_change(f"Edited component at index {index} (Part Number: {old_part}).")
 
     def delete_component(self, index):
-        if 0 <= index < len(self.components):
+        with self.catalogue_lock:
+            if not 0 <= index < len(self.components):
+                return
             removed = self.components.pop(index)
             self.undo_stack.append((removed, index))
-            self.save_components()
-            removed_part = removed["part_info"].get("part_number", "Unknown")
-            self.log_change(f"Deleted component at index {index} (Part Number: {removed_part}).")
+            self.save_components([{"op": "delete", "index": index, "component": removed}])
+        removed_part = removed["part_info"].get("part_number", "Unknown")
+        self.log_change(f"Deleted component at index {index} (Part Number: {removed_part}).")
 
     def get_statistics(self):
         total_parts = len(self.components)
-        types = set(comp["part_info"]["type"] for comp in self.components)
-        return {"total_parts": total_parts, "types": list(types)}
+        return {"total_parts": total_parts, "types": self.stats.types()}
     
     def barcode_decoder(self, barcode, show_errors=True):
         # Validate and remove header
@@ -351,106 +547,80 @@ class Backend:
         }
         return parsed_data
     
-    def check_duplicate(self, component):
+    def check_duplicate(self, component):
         new_raw = component["manufacturer_number"].strip().lower()
-        new_part_number = self.normalize_part_number(new_raw)
 
         try:
             new_count = int(component.get("count", 0))
         except ValueError:
             new_count = 0
 
-        existing_components = self.get_all_components()
-        part_map = {}  # maps normalized part → full part
-        normalized_parts = []
-
-        for comp in existing_components:
-            part = comp.get("part_info", {}).get("manufacturer_number", "").strip().lower()
-            if part:
-                normalized = self.normalize_part_number(part)
-                part_map[normalized] = part  # last one wins if duplicates
-                normalized_parts.append(normalized)
-
-        # Exact match (normalized)
-        if new_part_number in normalized_parts:
-            actual_match = part_map[new_part_number]
-            for comp in existing_components:
-                if comp.get("part_info", {}).get("manufacturer_number", "").strip().lower() == actual_match:
-                    try:
-                        existing_count = int(comp["part_info"].get("count", 0))
-                    except ValueError:
-                        existing_count = 0
-                    updated_count = existing_count + new_count
-                    comp["part_info"]["count"] = updated_count
-
-                    self._notify("info", "Found Duplicate", f"Component {actual_match} already exists.\nAdded {new_count} units.")
-                    loc = comp["part_info"]["location"]
-                    self.ledControl.set_led_on(loc, 0, 255, 0)
-                    self._notify("info", "Fill Vial", f"Fill vial at {loc}.")
-                    self.ledControl.turn_off_led(loc)
-
-                    self.log_change(
-                        f"Updated component '{actual_match}' count from {existing_count} to {updated_count} (exact match after normalizing)."
-                    )
-
-                    self.save_components()
-                    return False
-
-        # Fuzzy match using normalized parts
-        close_matches = difflib.get_close_matches(new_part_number, normalized_parts, n=1, cutoff=0.8)
-        if close_matches:
-            suggested_norm = close_matches[0]
-            suggested_actual = part_map[suggested_norm]
-
-            response = self._confirm(
-                "Possible Duplicate",
-                f"Did you mean '{suggested_actual}' instead of '{new_raw}'?"
-            )
-            if response:
-                for comp in existing_components:
-                    if comp.get("part_info", {}).get("manufacturer_number", "").strip().lower() == suggested_actual:
-                        try:
-                            existing_count = int(comp["part_info"].get("count", 0))
-                        except ValueError:
-                            existing_count = 0
-                        updated_count = existing_count + new_count
-                        comp["part_info"]["count"] = updated_count
-
-                        self._notify("info", "Found Duplicate", f"Component {suggested_actual} already exists.\nAdded {new_count} units.")
-                        loc = comp["part_info"]["location"]
-                        self.ledControl.set_led_on(loc, 0, 255, 0)
-                        self._notify("info", "Fill Vial", f"Fill vial at {loc}.")
-                        self.ledControl.turn_off_led(loc)
-
-                        self.log_change(
-                            f"Updated component '{suggested_actual}' count from {existing_count} to {updated_count} (fuzzy matched to '{new_raw}')."
-                        )
-
-                        self.save_components()
-                        return False
-
-        return True  # No match
+        match = self.find_manufacturer_match(new_raw)
+        if match is None:
+            return True  # No match
+        comp, actual_match, exact = match
+
+        # Fuzzy matches need confirmation before they are merged.
+        if not exact and not self._confirm(
+            "Possible Duplicate",
+            f"Did you mean '{actual_match}' instead of '{new_raw}'?"
+        ):
+            return True
+
+        # Taken only now, so the lock is never held while a dialog is open.
+        with self.catalogue_lock:
+            try:
+                existing_count = int(comp["part_info"].get("count", 0))
+            except ValueError:
+                existing_count = 0
+            updated_count = existing_count + new_count
+            comp["part_info"]["count"] = updated_count
+
+        self._notify("info", "Found Duplicate", f"Component {actual_match} already exists.\nAdded {new_count} units.")
+        loc = comp["part_info"]["location"]
+        self.ledControl.set_led_on(loc, 0, 255, 0)
+        self._notify("info", "Fill Vial", f"Fill vial at {loc}.")
+        self.ledControl.turn_off_led(loc)
+
+        if exact:
+            reason = "exact match after normalizing"
+        else:
+            reason = f"fuzzy matched to '{new_raw}'"
+        self.log_change(
+            f"Updated component '{actual_match}' count from {existing_count} to {updated_count} ({reason})."
+        )
+
+        self.save_component(comp)
+        return False
+
+    def add_to_count(self, component, amount, reason):
+        """Adds `amount` to a catalogue component's count, logs and saves it. Returns the new count."""
+        with self.catalogue_lock:
+            try:
+                existing_count = int(component["part_info"].get("count", 0))
+            except ValueError:
+                existing_count = 0
+            new_count = existing_count + amount
+            component["part_info"]["count"] = new_count
+        self.log_change(
+            f"Updated component '{component['part_info'].get('manufacturer_number', 'Unknown')}' "
+            f"count from {existing_count} to {new_count} ({reason})."
+        )
+        self.save_component(component)
+        return new_count
 
     def get_low_stock_components(self):
         """
         Returns a list of components for which the current count is less than
         the low stock threshold (which is stored in the metadata).
         """
-        low_stock_components = []
-        for comp in self.components:
-            try:
-                count = int(comp["part_info"].get("count", 0))
-            except (ValueError, TypeError):
-                count = 0
-            low_stock_value = comp["metadata"].get("low_stock")
-            try:
-                low_stock_value_int = int(low_stock_value)
-            except (ValueError, TypeError):
-                continue  # Skip components with no valid low_stock value
-            
-            if count < low_stock_value_int:
-                low_stock_components.append(comp)
-        return low_stock_components
+        return self.stats.low_stock_components(self.components)
+
+    def get_low_stock_count(self):
+        return self.stats.low_stock_count()
+
+    def is_low_stock(self, component):
+        return self.stats.is_low_stock(component)
 
     def parse_bom(self, file_path):
         """
@@ -476,24 +646,18 @@ class Backend:
                 if part.lower().startswith("total"):
                     break
 
-                normalized_digikey = self.normalize_part_number(digikey)
-
                 found = False
                 location = None
                 current_count = None
 
-                for comp in self.get_all_components():
-                    comp_part = comp.get("part_info", {}).get("part_number", "").strip()
-                    normalized_comp = self.normalize_part_number(comp_part)
-
-                    if normalized_comp == normalized_digikey:
-                        found = True
-                        location = comp["part_info"].get("location")
-                        try:
-                            current_count = int(comp["part_info"].get("count", 0))
-                        except ValueError:
-                            current_count = None
-                        break
+                comp = self.find_component(digikey)
+                if comp is not None:
+                    found = True
+                    location = comp["part_info"].get("location")
+                    try:
+                        current_count = int(comp["part_info"].get("count", 0))
+                    except ValueError:
+                        current_count = None
 
                 bom_list.append({
                     "part":          part,
@@ -510,50 +674,50 @@ class Backend:
 
     def process_bom_out(self, bom_list, board_name):
         results = []
-        for row in bom_list:
-            digikey = row.get("digikey", "").strip()
-            try:
-                quantity_used = int(row.get("quantity", 0))
-            except ValueError:
-                quantity_used = 0
-
-            found_match = False
-
-            if row.get("found"):
-                for comp in self.get_all_components():
-                    inv_part = comp["part_info"].get("part_number", "").strip()
-                    if self.normalize_part_number(inv_part) == self.normalize_part_number(digikey):
-                        found_match = True
-                        try:
-                            current = int(comp["part_info"].get("count", 0))
-                        except ValueError:
-                            current = 0
-
-                        if current < quantity_used:
-                            results.append({
-                                "part": digikey,
-                                "remaining": current,
-                                "status": "Out of Stock"
-                            })
-                        else:
-                            new_count = current - quantity_used
-                            comp["part_info"]["count"] = new_count
-                            comp["metadata"]["in_use"] = f"Used for {board_name}"
-                            results.append({
-                                "part": digikey,
-                                "remaining": new_count,
-                                "status": "Updated"
-                            })
-                        break
-
-            if not found_match:
-                results.append({
-                    "part": digikey,
-                    "remaining": "N/A",
-                    "status": "Not found in catalogue"
-                })
+        changes = []
+        with self.catalogue_lock:
+            for row in bom_list:
+                digikey = row.get("digikey", "").strip()
+                try:
+                    quantity_used = int(row.get("quantity", 0))
+                except ValueError:
+                    quantity_used = 0
+
+                found_match = False
+
+                comp = self.find_component(digikey) if row.get("found") else None
+                if comp is not None:
+                    found_match = True
+                    try:
+                        current = int(comp["part_info"].get("count", 0))
+                    except ValueError:
+                        current = 0
+
+                    if current < quantity_used:
+                        results.append({
+                            "part": digikey,
+                            "remaining": current,
+                            "status": "Out of Stock"
+                        })
+                    else:
+                        new_count = current - quantity_used
+                        comp["part_info"]["count"] = new_count
+                        comp["metadata"]["in_use"] = f"Used for {board_name}"
+                        changes.append({"op": "update", "component": comp})
+                        results.append({
+                            "part": digikey,
+                            "remaining": new_count,
+                            "status": "Updated"
+                        })
+
+                if not found_match:
+                    results.append({
+                        "part": digikey,
+                        "remaining": "N/A",
+                        "status": "Not found in catalogue"
+                    })
 
-        self.save_components()
+        self.save_components(changes)
         return results
 
     def process_returned_vials(self, bom_list, additional_usage):
@@ -574,21 +738,21 @@ class Backend:
                 additional used, and status.
         """
         results = []
-        for row in bom_list:
-            digikey = row.get("digikey", "").strip()
-            normalized_digikey = self.normalize_part_number(digikey)
-            additional = additional_usage.get(digikey, 0)
-            found = False
-
-            # Locate the component in the catalogue
-            for comp in self.components:
-                comp_digikey = comp.get("part_info", {}).get("part_number", "").strip()
-                if self.normalize_part_number(comp_digikey) == normalized_digikey:
-                    found = True
-                    try:
-                        current_count = int(comp["part_info"].get("count", 0))
-                    except ValueError:
-                        current_count = 0
+        changes = []
+        with self.catalogue_lock:
+            for row in bom_list:
+                digikey = row.get("digikey", "").strip()
+                additional = additional_usage.get(digikey, 0)
+                found = False
+
+                # Locate the component in the catalogue
+                comp = self.find_component(digikey)
+                if comp is not None:
+                    found = True
+                    try:
+                        current_count = int(comp["part_info"].get("count", 0))
+                    except ValueError:
+                        current_count = 0
 
                     new_count = current_count - additional
                     comp["part_info"]["count"] = new_count
@@ -598,6 +762,7 @@ class Backend:
                         comp["metadata"]["in_use"] = "Available"
                     else:
                         comp["metadata"] = {"in_use": "Available"}
+                    changes.append({"op": "update", "component": comp})
 
                     results.append({
                         "part": digikey,
@@ -605,18 +770,17 @@ class Backend:
                         "additional_used": additional,
                         "status": "Returned"
                     })
-                    break
 
-            if not found:
-                results.append({
-                    "part": digikey,
-                    "remaining": "N/A",
-                    "additional_used": additional,
-                    "status": "Component not found in catalogue"
-                })
+                if not found:
+                    results.append({
+                        "part": digikey,
+                        "remaining": "N/A",
+                        "additional_used": additional,
+                        "status": "Component not found in catalogue"
+                    })
 
         # Save the updated catalogue to file.
-        self.save_components()
+        self.save_components(changes)
         return results
 
     def checkout(self, part_number: str, qty: int):
@@ -630,50 +794,48 @@ class Backend:
             "new_count": int or None
           }
         """
-        key = part_number.strip().lower()
-        # find component
-        for comp in self.components:
-            if comp["part_info"]["part_number"].strip().lower() == key:
-                break
-        else:
-            return {
-                "success": False,
-                "message": f"Component '{part_number}' not found.",
-                "location": None,
-                "new_count": None
-            }
-
-        # parse current count
-        try:
-            current = int(comp["part_info"].get("count", 0))
-        except ValueError:
-            return {
-                "success": False,
-                "message": f"Invalid count for '{part_number}'.",
-                "location": None,
-                "new_count": None
-            }
-
-        # validate qty
-        if qty <= 0:
-            return {
-                "success": False,
-                "message": "Quantity must be positive.",
-                "location": None,
-                "new_count": current
-            }
-        if qty > current:
-            return {
-                "success": False,
-                "message": "Not enough components in stock.",
-                "location": comp["part_info"].get("location"),
-                "new_count": current
-            }
-
-        # perform checkout
-        new_count = current - qty
-        comp["part_info"]["count"] = new_count
-        self.save_components()
+        with self.catalogue_lock:
+            # find component
+            comp = self._find_exact_part(part_number)
+            if comp is None:
+                return {
+                    "success": False,
+                    "message": f"Component '{part_number}' not found.",
+                    "location": None,
+                    "new_count": None
+                }
+
+            # parse current count
+            try:
+                current = int(comp["part_info"].get("count", 0))
+            except ValueError:
+                return {
+                    "success": False,
+                    "message": f"Invalid count for '{part_number}'.",
+                    "location": None,
+                    "new_count": None
+                }
+
+            # validate qty
+            if qty <= 0:
+                return {
+                    "success": False,
+                    "message": "Quantity must be positive.",
+                    "location": None,
+                    "new_count": current
+                }
+            if qty > current:
+                return {
+                    "success": False,
+                    "message": "Not enough components in stock.",
+                    "location": comp["part_info"].get("location"),
+                    "new_count": current
+                }
+
+            # perform checkout
+            new_count = current - qty
+            comp["part_info"]["count"] = new_count
+            self.save_component(comp)
 
         return {
             "success":   True,
@@ -689,12 +851,12 @@ class Backend:
         """
         if self.undo_stack:
             component, index = self.undo_stack.pop()
-            # Insert the component back at its original index.
-            if index >= len(self.components):
-                self.components.append(component)
-            else:
+            with self.catalogue_lock:
+                # Insert the component back at its original index.
+                if index >= len(self.components):
+                    index = len(self.components)
                 self.components.insert(index, component)
-            self.save_components()
+                self.save_components([{"op": "insert", "index": index, "component": component}])
             part_number = component["part_info"].get("part_number", "Unknown")
             self.log_change(f"Restored component at index {index} (Part Number: {part_number}).")
             return True
@@ -728,19 +890,22 @@ class Backend:
         """
         Creates a backup copy of the current catalogue.
         The backup is stored in a "backups" folder in the same directory as the catalogue.
-        The backup file is named with a timestamp appended.
+        The backup file is named with a timestamp appended; a pending journal
+        is copied next to it, and SQLite catalogues are copied with the
+        online backup API.
         """
         catalogue_path = self.data_file
         backup_dir = os.path.join(os.path.dirname(catalogue_path), "backups")
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        base = os.path.basename(catalogue_path)
-        name, ext = os.path.splitext(base)
-        backup_filename = f"{name}_{timestamp}{ext}"
-        backup_path = os.path.join(backup_dir, backup_filename)
-        try:
-            shutil.copy2(catalogue_path, backup_path)
+        try:
+            # Runs on the backup timer thread: hold the lock so the store is not
+            # written to while it is copied, and copy the store the catalogue
+            # lives in now rather than letting _catalogue_store() swap one in.
+            with self.catalogue_lock:
+                store = self.store or open_catalogue_store(self.data_file, self.storage_engine)
+                backup_path = store.backup(backup_dir, timestamp)
             logger.info("Backup created: %s", backup_path)
         except Exception as e:
             logger.exception("Error creating backup: %s", e)
@@ -0,0 +1,117 @@
+"""
+End-to-end LED latency benchmark against the pty simulator.
+
+    python benchmark_leds.py [--baudrate 9600] [--runs 10] [--firmware both|full|legacy]
+
+Times are from the LedController call until the simulator has received the
+last byte of the resulting commands, including the modelled wire time at
+the given baud rate.
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from led_simulator import FULL_CAPABILITIES, LedSimulator
+from ledSerial import LedController
+
+BOM_SIZE = 60
+OFF = (0, 0, 0)
+
+
+def location_for(index):
+    return f"{index // 26 + 1}{chr(index % 26 + 65)}"
+
+
+def measure(simulator, action, predicate, timeout=60.0):
+    simulator.wait_idle()
+    simulator.reset()
+    started = time.monotonic()
+    action().result(timeout=timeout)
+    if not simulator.wait_idle(timeout=timeout) or not predicate(simulator.pixels):
+        raise RuntimeError("simulator never reached the expected state")
+    if not simulator.commands:
+        return 0.0, 0
+    return simulator.commands[-1].arrived_at - started, len(simulator.commands)
+
+
+def run_case(name, simulator, controller, runs):
+    results = []
+    locations = [location_for(index) for index in range(BOM_SIZE)]
+    bom = {controller.location_to_index(loc): controller._compute_color(loc) for loc in locations}
+
+    def all_off(pixels):
+        return all(color == OFF for color in pixels)
+
+    def light_some():
+        controller.highlight_all(locations[:3]).result(timeout=30)
+
+    for run in range(runs):
+        location = locations[(run * 7) % BOM_SIZE]
+        index = controller.location_to_index(location)
+        color = controller._compute_color(location)
+        results.append(("highlight_location", *measure(
+            simulator,
+            lambda: controller.highlight_location(location),
+            lambda pixels: pixels[index] == color and sum(1 for value in pixels if value != OFF) == 1,
+        )))
+
+        controller.turn_off_all().result(timeout=30)
+        results.append((f"highlight_all ({BOM_SIZE} parts)", *measure(
+            simulator,
+            lambda: controller.highlight_all(locations),
+            lambda pixels: all(pixels[i] == c for i, c in bom.items()),
+        )))
+
+        controller.turn_off_all().result(timeout=30)
+        light_some()
+        results.append(("turn_off_all (3 lit)", *measure(simulator, controller.turn_off_all, all_off)))
+
+        # Forget what the strip shows, as right after connecting
+        light_some()
+        controller.framebuffer = {}
+        results.append(("turn_off_all (unknown state)", *measure(simulator, controller.turn_off_all, all_off)))
+
+    print(f"\n{name}")
+    print(f"{'operation':32} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'commands':>9}")
+    for operation in dict.fromkeys(result[0] for result in results):
+        latencies = [result[1] * 1000 for result in results if result[0] == operation]
+        commands = [result[2] for result in results if result[0] == operation]
+        print(
+            f"{operation:32} {statistics.mean(latencies):9.1f} {statistics.median(latencies):9.1f} "
+            f"{max(latencies):9.1f} {statistics.mean(commands):9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--firmware", choices=("both", "full", "legacy"), default="both")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    firmwares = {
+        "full": ("Firmware with CAPS " + " ".join(FULL_CAPABILITIES), FULL_CAPABILITIES),
+        "legacy": ("Legacy firmware (SET lines only)", None),
+    }
+    selected = firmwares if args.firmware == "both" else {args.firmware: firmwares[args.firmware]}
+    for title, capabilities in selected.values():
+        with LedSimulator(baudrate=args.baudrate, capabilities=capabilities) as simulator:
+            controller = LedController(
+                show_errors=False,
+                connect=False,
+                port=simulator.port,
+                baudrate=args.baudrate,
+                timeout=1,
+            )
+            controller.connect_serial()
+            try:
+                controller.turn_off_all().result(timeout=60)
+                run_case(f"{title} at {args.baudrate} baud", simulator, controller, args.runs)
+            finally:
+                controller.close()
+
+
+if __name__ == "__main__":
+    main()
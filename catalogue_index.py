@@ -0,0 +1,675 @@
+from collections import Counter
+from difflib import SequenceMatcher
+
+
+class KeyIndex:
+    """
+    Maps a key derived from each component (for example a normalized part
+    number) to the components sharing it, kept in catalogue order.
+
+    The index is maintained from the same change records Backend passes to
+    its catalogue store: {"op": "insert" | "update" | "delete", ...}.
+    An optional `observer` (clear/add/discard) is told whenever a key starts
+    or stops being present.
+    """
+
+    def __init__(self, key_func, observer=None):
+        self.key_func = key_func
+        self.observer = observer
+        self._buckets = {}
+        self._keys = {}
+
+    def rebuild(self, components):
+        self._buckets = {}
+        self._keys = {}
+        if self.observer is not None:
+            self.observer.clear()
+        for component in components:
+            key = self.key_func(component)
+            self._keys[id(component)] = key
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = []
+                self._key_added(key)
+            bucket.append(component)
+
+    def apply(self, changes, components):
+        for change in changes:
+            op = change["op"]
+            component = change["component"]
+            if op == "insert":
+                key = self.key_func(component)
+                self._keys[id(component)] = key
+                if change.get("index") == 0:
+                    bucket = self._buckets.get(key)
+                    if bucket is None:
+                        self._buckets[key] = [component]
+                        self._key_added(key)
+                    else:
+                        bucket.insert(0, component)
+                else:
+                    self._reorder(key, components)
+            elif op == "update":
+                previous = change.get("previous", component)
+                old_key = self._keys.get(id(previous))
+                new_key = self.key_func(component)
+                if old_key is not None and old_key == new_key:
+                    if previous is not component:
+                        bucket = self._buckets[old_key]
+                        for position, existing in enumerate(bucket):
+                            if existing is previous:
+                                bucket[position] = component
+                                break
+                        del self._keys[id(previous)]
+                        self._keys[id(component)] = new_key
+                else:
+                    self._remove(previous)
+                    self._keys[id(component)] = new_key
+                    self._reorder(new_key, components)
+            elif op == "delete":
+                self._remove(component)
+
+    def get(self, key):
+        """Returns the components stored under `key`, in catalogue order."""
+        return self._buckets.get(key, ())
+
+    def first(self, key):
+        bucket = self._buckets.get(key)
+        return bucket[0] if bucket else None
+
+    def keys(self):
+        return self._buckets.keys()
+
+    def _key_added(self, key):
+        if self.observer is not None:
+            self.observer.add(key)
+
+    def _key_removed(self, key):
+        if self.observer is not None:
+            self.observer.discard(key)
+
+    def _remove(self, component):
+        key = self._keys.pop(id(component), None)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        for position, existing in enumerate(bucket):
+            if existing is component:
+                bucket.pop(position)
+                break
+        if not bucket:
+            del self._buckets[key]
+            self._key_removed(key)
+
+    def _reorder(self, key, components):
+        # Rare path (restores and re-keyed edits): rebuild one bucket from the
+        # cached keys without re-deriving them.
+        existed = key in self._buckets
+        bucket = [component for component in components if self._keys.get(id(component)) == key]
+        if bucket:
+            self._buckets[key] = bucket
+            if not existed:
+                self._key_added(key)
+        elif existed:
+            del self._buckets[key]
+            self._key_removed(key)
+
+
+class FuzzyMatchIndex:
+    """
+    Near-duplicate lookup returning the same best match as
+    difflib.get_close_matches(word, strings, n=1, cutoff=cutoff).
+
+    Candidates are narrowed with a bigram filter before being scored with
+    SequenceMatcher. Two strings with ratio 2*M/T >= cutoff share at least
+    3*M - T - 1 bigram occurrences: the matching blocks hold M characters in
+    k blocks, each block of length L contributes L - 1 shared bigrams, and
+    consecutive blocks are separated by at least one unmatched character,
+    so k - 1 <= T - 2*M. A candidate must therefore share one of the query's
+    rarest bigrams (prefix filtering) before its overlap is counted. Lengths
+    whose bound is not positive are scanned. Empty strings are never indexed.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._bigrams = {}
+        self._profiles = {}
+        self._by_length = {}
+
+    def add(self, text):
+        if not text:
+            return
+        strings = self._by_length.setdefault(len(text), set())
+        if text in strings:
+            return
+        strings.add(text)
+        profile = self._profiles[text] = self._bigram_counts(text)
+        for bigram in profile:
+            self._bigrams.setdefault(bigram, set()).add(text)
+
+    def discard(self, text):
+        strings = self._by_length.get(len(text)) if text else None
+        if not strings or text not in strings:
+            return
+        strings.discard(text)
+        if not strings:
+            del self._by_length[len(text)]
+        for bigram in self._profiles.pop(text):
+            postings = self._bigrams[bigram]
+            postings.discard(text)
+            if not postings:
+                del self._bigrams[bigram]
+
+    def __len__(self):
+        return sum(len(strings) for strings in self._by_length.values())
+
+    def best_match(self, word, cutoff=0.8):
+        """Returns the most similar indexed string scoring >= cutoff, or None."""
+        if not word:
+            return None
+        word_length = len(word)
+
+        thresholds = {}
+        candidates = set()
+        for length in self._by_length:
+            total = word_length + length
+            # Same length bound as SequenceMatcher.real_quick_ratio().
+            if 2.0 * min(word_length, length) / total < cutoff:
+                continue
+            needed = 3 * self._min_matches(total, cutoff) - total - 1
+            if needed <= 0:
+                candidates.update(self._by_length[length])
+            else:
+                thresholds[length] = needed
+
+        if thresholds:
+            profile = self._bigram_counts(word)
+            # Any string missing all of the rarest (size - min_needed + 1) bigram
+            # occurrences of the query shares fewer than min_needed of them.
+            remaining = sum(profile.values()) - min(thresholds.values()) + 1
+            probes = set()
+            for bigram in sorted(profile, key=lambda gram: len(self._bigrams.get(gram, ()))):
+                if remaining <= 0:
+                    break
+                probes.update(self._bigrams.get(bigram, ()))
+                remaining -= profile[bigram]
+            for text in probes:
+                needed = thresholds.get(len(text))
+                if needed is None:
+                    continue
+                other = self._profiles[text]
+                shared = sum(min(count, other[bigram]) for bigram, count in profile.items() if bigram in other)
+                if shared >= needed:
+                    candidates.add(text)
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        bounded = []
+        for text in candidates:
+            matcher.set_seq1(text)
+            if matcher.real_quick_ratio() >= cutoff:
+                upper = matcher.quick_ratio()
+                if upper >= cutoff:
+                    bounded.append((upper, text))
+
+        # quick_ratio() bounds ratio(), so once a bound (with its tie-breaking
+        # string) falls below the best score nothing later can beat it.
+        best = None
+        for upper, text in sorted(bounded, reverse=True):
+            if best is not None and (upper, text) < best:
+                break
+            matcher.set_seq1(text)
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or (score, text) > best):
+                best = (score, text)
+        return best[1] if best else None
+
+    @staticmethod
+    def _min_matches(total, cutoff):
+        # Smallest match count M with 2.0 * M / total >= cutoff, using the same
+        # float comparison difflib does.
+        matches = max(0, int(cutoff * total / 2) - 1)
+        while 2.0 * matches / total < cutoff:
+            matches += 1
+        return matches
+
+    @staticmethod
+    def _bigram_counts(text):
+        return Counter(text[position:position + 2] for position in range(len(text) - 1))
+
+
+class SearchCancelled(Exception):
+    """Raised when a search is abandoned because a newer one superseded it."""
+
+
+class SearchIndex:
+    """
+    Trigram inverted index answering catalogue substring searches.
+
+    A component matches when the lowered query is a substring of one of its
+    lowered part_info/metadata values, or the normalized query is a substring
+    of such a value once normalized. The field strings are cached per
+    component, so candidates taken from the posting-list intersection are
+    verified without re-deriving them. Queries shorter than a trigram are
+    checked against the cached strings directly, as are queries whose
+    rarest trigram is too common to narrow anything. Each component's strings
+    are cached joined by a NUL separator so one substring test covers them.
+
+    Posting lists are append-only: removed or edited components leave stale
+    entries behind, which verification filters out, and the index is rebuilt
+    once they outnumber the live ones. Building is deferred to the first
+    search after a rebuild is requested.
+
+    Searches accept a `cancelled` callable, polled while scanning, and raise
+    SearchCancelled once it returns True.
+    """
+
+    GRAM = 3
+    SEPARATOR = "\0"
+    CANCEL_CHECK_INTERVAL = 512
+
+    def __init__(self, normalize):
+        self.normalize = normalize
+        self._postings = {}
+        self._fields = {}
+        self._live = 0
+        self._stale = 0
+        self._built = False
+
+    def rebuild(self, components):
+        self._postings = {}
+        self._fields = {}
+        self._live = 0
+        self._stale = 0
+        self._built = False
+
+    def apply(self, changes, components):
+        if not self._built:
+            return
+        for change in changes:
+            op = change["op"]
+            component = change["component"]
+            if op == "insert":
+                self._add(component)
+            elif op == "update":
+                previous = change.get("previous", component)
+                old_grams = self._remove(previous)
+                self._add(component, skip=old_grams if previous is component else None)
+            elif op == "delete":
+                self._remove(component)
+        if self._stale > self._live:
+            self.rebuild(components)
+
+    def search(self, query, components, cancelled=None):
+        """Returns the matching components in catalogue order."""
+        if not self._built:
+            self._build(components)
+        self._check(cancelled)
+        query = query.lower()
+        normalized_query = self.normalize(query)
+        matches = self._matcher(query, normalized_query)
+
+        candidates = None
+        if len(query) >= self.GRAM and len(normalized_query) >= self.GRAM:
+            candidates = self._candidates(query)
+            if candidates is not None and normalized_query != query:
+                extra = self._candidates(normalized_query)
+                candidates = None if extra is None else candidates | extra
+        if candidates is None:
+            return self._select(components, matches, cancelled)
+
+        self._check(cancelled)
+        matched = {key for key in candidates if matches(key)}
+        if not matched:
+            return []
+        return self._select(components, matched.__contains__, cancelled)
+
+    def filter(self, query, components, cancelled=None):
+        """Returns the members of `components` matching `query`, keeping their order."""
+        if not self._built:
+            return self.search(query, components, cancelled)
+        query = query.lower()
+        matches = self._matcher(query, self.normalize(query))
+        return self._select(components, matches, cancelled)
+
+    def _select(self, components, predicate, cancelled):
+        if cancelled is None:
+            return [component for component in components if predicate(id(component))]
+        selected = []
+        for position, component in enumerate(components):
+            if position % self.CANCEL_CHECK_INTERVAL == 0:
+                self._check(cancelled)
+            if predicate(id(component)):
+                selected.append(component)
+        return selected
+
+    @staticmethod
+    def _check(cancelled):
+        if cancelled is not None and cancelled():
+            raise SearchCancelled()
+
+    def _matcher(self, query, normalized_query):
+        if self.SEPARATOR in query:
+            def matches(key):
+                fields = self._fields.get(key)
+                if fields is None:
+                    return False
+                lowered, normalized = fields
+                return any(query in value for value in lowered.split(self.SEPARATOR)) or any(
+                    normalized_query in value for value in normalized.split(self.SEPARATOR)
+                )
+        else:
+            def matches(key):
+                fields = self._fields.get(key)
+                return fields is not None and (query in fields[0] or normalized_query in fields[1])
+        return matches
+
+    def _build(self, components):
+        self._built = True
+        for component in components:
+            self._add(component)
+
+    def _candidates(self, text):
+        postings = []
+        for gram in self._grams(text):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        if len(postings[0]) > len(self._fields) // 4:
+            return None
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _add(self, component, skip=None):
+        key = id(component)
+        lowered = []
+        for section in ("part_info", "metadata"):
+            lowered.extend(str(value).lower() for value in component.get(section, {}).values())
+        normalized = [self.normalize(value) for value in lowered]
+        if lowered:
+            lowered_text = self.SEPARATOR.join(lowered)
+            normalized_text = self.SEPARATOR.join(normalized)
+            if normalized_text == lowered_text:
+                normalized_text = lowered_text
+            self._fields[key] = (lowered_text, normalized_text)
+        else:
+            # Nothing to match against, not even an empty query.
+            self._fields[key] = None
+        grams = self._component_grams(lowered, normalized)
+        self._live += len(grams)
+        if skip:
+            # In-place edit: grams the component already had are still posted.
+            self._stale -= len(grams & skip)
+            grams -= skip
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                self._postings[gram] = [key]
+            else:
+                posting.append(key)
+
+    def _remove(self, component):
+        key = id(component)
+        if key not in self._fields:
+            return set()
+        fields = self._fields.pop(key)
+        if fields is None:
+            return set()
+        grams = self._component_grams(*(text.split(self.SEPARATOR) for text in fields))
+        self._live -= len(grams)
+        self._stale += len(grams)
+        return grams
+
+    def _component_grams(self, lowered, normalized):
+        grams = set()
+        for value in set(lowered).union(normalized):
+            grams.update(self._grams(value))
+        return grams
+
+    def _grams(self, text):
+        return {text[position:position + self.GRAM] for position in range(len(text) - self.GRAM + 1)}
+
+
+class SearchSession:
+    """
+    Remembers the last query answered through a SearchIndex. A query that
+    extends the previous one (contains it) only re-checks the previous
+    results. That only holds when neither query is changed by normalizing,
+    since stripping a DigiKey package suffix is not monotonic.
+
+    `source` returns (components, version); a different version means the
+    catalogue changed and the cached results are discarded. `lock`, when
+    given, is held for the duration of each search.
+    """
+
+    def __init__(self, index, source, lock=None):
+        self.index = index
+        self.source = source
+        self.lock = lock
+        self.reset()
+
+    def reset(self):
+        self._query = None
+        self._version = None
+        self._results = None
+
+    def search(self, query, cancelled=None):
+        if self.lock is None:
+            return self._search(query, cancelled)
+        with self.lock:
+            return self._search(query, cancelled)
+
+    def _search(self, query, cancelled):
+        components, version = self.source()
+        query = query.lower()
+        if version == self._version and query == self._query:
+            results = self._results
+        elif version == self._version and self._query is not None and self._refines(query):
+            results = self.index.filter(query, self._results, cancelled)
+        else:
+            results = self.index.search(query, components, cancelled)
+        self._query = query
+        self._version = version
+        self._results = results
+        return list(results)
+
+    def _refines(self, query):
+        previous = self._query
+        normalize = self.index.normalize
+        return previous in query and normalize(previous) == previous and normalize(query) == query
+
+
+class CatalogueStats:
+    """
+    Catalogue metrics kept up to date from change records: how many
+    components there are of each type, and which components are below their
+    low-stock threshold.
+    """
+
+    def __init__(self):
+        self.rebuild(())
+
+    def rebuild(self, components):
+        self.type_counts = Counter()
+        self._types = {}
+        self._low_stock = set()
+        for component in components:
+            self._add(component)
+
+    def apply(self, changes, components):
+        for change in changes:
+            op = change["op"]
+            component = change["component"]
+            if op == "insert":
+                self._add(component)
+            elif op == "update":
+                self._remove(change.get("previous", component))
+                self._add(component)
+            elif op == "delete":
+                self._remove(component)
+
+    def types(self):
+        return list(self.type_counts)
+
+    def low_stock_count(self):
+        return len(self._low_stock)
+
+    def is_low_stock(self, component):
+        return id(component) in self._low_stock
+
+    def low_stock_components(self, components):
+        """Returns the low-stock members of `components`, in catalogue order."""
+        if not self._low_stock:
+            return []
+        return [component for component in components if id(component) in self._low_stock]
+
+    @staticmethod
+    def below_low_stock(component):
+        try:
+            count = int(component.get("part_info", {}).get("count", 0))
+        except (ValueError, TypeError):
+            count = 0
+        try:
+            low_stock_value = int(component.get("metadata", {}).get("low_stock"))
+        except (ValueError, TypeError):
+            return False  # No valid low_stock value
+        return count < low_stock_value
+
+    def _add(self, component):
+        key = id(component)
+        component_type = component.get("part_info", {}).get("type")
+        self._types[key] = component_type
+        self.type_counts[component_type] += 1
+        if self.below_low_stock(component):
+            self._low_stock.add(key)
+
+    def _remove(self, component):
+        key = id(component)
+        if key not in self._types:
+            return
+        component_type = self._types.pop(key)
+        self.type_counts[component_type] -= 1
+        if self.type_counts[component_type] <= 0:
+            del self.type_counts[component_type]
+        self._low_stock.discard(key)
+
+
+class LocationIndex:
+    """
+    Reference-counted set of the location codes in use, plus an occupancy
+    bitmap over the auto-assignable LED slots (slot i is location
+    `location_for_slot(i)`). Allocation scans forward from a next-free hint
+    that only moves back when a slot is released, so it is O(1) amortized.
+
+    Slots can be reserved ahead of a batch check-in; a reservation is
+    consumed when a component is stored at that location, and is skipped by
+    allocation until then.
+    """
+
+    def __init__(self, location_for_slot, slot_count):
+        self._locations = [location_for_slot(slot) for slot in range(slot_count)]
+        self._slots = {location: slot for slot, location in enumerate(self._locations)}
+        self._reserved = set()
+        self.rebuild(())
+
+    def rebuild(self, components, reserved=None):
+        """
+        Recounts the locations in use. Reservations survive: the current ones,
+        or the location codes in `reserved` when carrying them over from
+        another layout. Those now occupied or off this layout are dropped.
+        """
+        if reserved is None:
+            reserved = self.reserved_locations()
+        self._counts = Counter()
+        self._keys = {}
+        self._occupied = bytearray(len(self._locations))
+        self._reserved = {self._slots[location] for location in reserved if location in self._slots}
+        self._hint = 0
+        for component in components:
+            self._add(component)
+
+    def apply(self, changes, components):
+        for change in changes:
+            op = change["op"]
+            component = change["component"]
+            if op == "insert":
+                self._add(component)
+            elif op == "update":
+                self._remove(change.get("previous", component))
+                self._add(component)
+            elif op == "delete":
+                self._remove(component)
+
+    def is_assigned(self, location):
+        return str(location or "").strip().upper() in self._counts
+
+    def assigned_locations(self):
+        return set(self._counts)
+
+    def reserved_locations(self):
+        return {self._locations[slot] for slot in self._reserved}
+
+    def allocate(self):
+        """Returns the first free, unreserved slot's location, or None when full."""
+        slot = self._next_free(self._hint)
+        self._hint = slot
+        return self._locations[slot] if slot < len(self._locations) else None
+
+    def reserve(self, count):
+        """Reserves up to `count` free locations, in slot order."""
+        reserved = []
+        slot = self._hint
+        while len(reserved) < count:
+            slot = self._next_free(slot)
+            if slot >= len(self._locations):
+                break
+            self._reserved.add(slot)
+            reserved.append(self._locations[slot])
+        return reserved
+
+    def release(self, locations):
+        """Drops reservations that were not used."""
+        for location in locations:
+            slot = self._slots.get(str(location or "").strip().upper())
+            if slot is not None and slot in self._reserved:
+                self._reserved.discard(slot)
+                self._hint = min(self._hint, slot)
+
+    def _next_free(self, slot):
+        occupied = self._occupied
+        reserved = self._reserved
+        while slot < len(occupied) and (occupied[slot] or slot in reserved):
+            slot += 1
+        return slot
+
+    def _add(self, component):
+        location = str(component.get("part_info", {}).get("location", "")).strip().upper()
+        if not location:
+            return
+        self._keys[id(component)] = location
+        self._counts[location] += 1
+        slot = self._slots.get(location)
+        if slot is not None:
+            self._occupied[slot] = 1
+            self._reserved.discard(slot)
+
+    def _remove(self, component):
+        location = self._keys.pop(id(component), None)
+        if location is None:
+            return
+        self._counts[location] -= 1
+        if self._counts[location] > 0:
+            return
+        del self._counts[location]
+        slot = self._slots.get(location)
+        if slot is not None:
+            self._occupied[slot] = 0
+            self._hint = min(self._hint, slot)
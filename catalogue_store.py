@@ -0,0 +1,445 @@
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+STORAGE_ENGINES = ("json", "sqlite")
+
+
+def open_catalogue_store(data_file, engine="json"):
+    """Returns the catalogue store for `data_file` using the configured engine."""
+    normalized = str(engine or "").strip().lower() or "json"
+    if normalized == "sqlite":
+        return SqliteCatalogueStore(data_file)
+    if normalized != "json":
+        logger.warning("Unknown catalogue storage engine %r. Using json.", engine)
+    return JsonCatalogueStore(data_file)
+
+
+def migrate_json_catalogue(data_file, db_file=None):
+    """
+    One-shot copy of a JSON catalogue (snapshot plus journal) into the SQLite
+    catalogue database. Returns the number of components migrated.
+    """
+    components = JsonCatalogueStore(data_file).load()
+    store = SqliteCatalogueStore(data_file, db_file=db_file)
+    store.open()
+    try:
+        store.write_snapshot(components)
+    finally:
+        store.close()
+    logger.info("Migrated %s components from %s to %s", len(components), data_file, store.db_file)
+    return len(components)
+
+
+class JsonCatalogueStore:
+    """
+    Keeps the component catalogue as a JSON snapshot plus an append-only
+    journal stored next to it (``<catalogue>.journal``).
+
+    Each mutation appends one JSON line to the journal and fsyncs it. The
+    journal starts with a header holding the digest of the snapshot it was
+    written against, so a journal left behind by an interrupted compaction is
+    recognised as already folded in and ignored on the next load.
+    """
+
+    COMPACT_THRESHOLD = 500
+    engine = "json"
+
+    def __init__(self, data_file, compact_threshold=None):
+        self.data_file = data_file
+        self.journal_file = f"{data_file}.journal"
+        self.compact_threshold = compact_threshold or self.COMPACT_THRESHOLD
+        self.journal_records = 0
+        self._snapshot_digest = None
+        self._journal = None
+        # Journal records refer to components by key: snapshot position at
+        # load/compaction time, then a running counter for inserted parts.
+        self._keys = {}
+        self._next_key = 0
+
+    def load(self):
+        """Reads the snapshot, replays the journal on top and returns the components."""
+        self.close()
+        try:
+            with open(self.data_file, "rb") as file:
+                raw = file.read()
+        except FileNotFoundError:
+            raw = b""
+        try:
+            components = json.loads(raw) if raw else []
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            components = []
+
+        self._snapshot_digest = hashlib.sha1(raw).hexdigest()
+        keyed = dict(enumerate(components))
+        self._next_key = len(components)
+        self.journal_records = self._replay(components, keyed)
+        self._keys = {id(component): key for key, component in keyed.items()}
+        if self.journal_records:
+            logger.info("Replayed %s journal records from %s", self.journal_records, self.journal_file)
+        return components
+
+    def apply(self, changes, components):
+        """
+        Appends the given change records to the journal. `components` is the
+        full in-memory catalogue, used when the journal has to be compacted or
+        a change cannot be expressed as a journal record.
+        """
+        if self._snapshot_digest is None:
+            self.write_snapshot(components)
+            return
+
+        records = []
+        for change in changes:
+            op = change["op"]
+            component = change["component"]
+            if op == "insert":
+                key = self._next_key
+                self._next_key += 1
+                self._keys[id(component)] = key
+                records.append({"op": "insert", "key": key, "index": change["index"], "component": component})
+            elif op == "update":
+                previous = change.get("previous", component)
+                key = self._keys.pop(id(previous), None)
+                if key is None:
+                    logger.warning("Journal has no key for an updated component; rewriting the snapshot.")
+                    self.write_snapshot(components)
+                    return
+                self._keys[id(component)] = key
+                records.append({"op": "update", "key": key, "component": component})
+            elif op == "delete":
+                key = self._keys.pop(id(component), None)
+                if key is None:
+                    logger.warning("Journal has no key for a deleted component; rewriting the snapshot.")
+                    self.write_snapshot(components)
+                    return
+                records.append({"op": "delete", "key": key, "index": change.get("index")})
+            else:
+                raise ValueError(f"Unknown catalogue change: {op}")
+
+        if not records:
+            return
+        self._append(records)
+        if self.journal_records >= self.compact_threshold:
+            self.write_snapshot(components)
+
+    def write_snapshot(self, components):
+        """Rewrites the JSON snapshot atomically and starts an empty journal."""
+        data = json.dumps(components, indent=4).encode("utf-8")
+        temp_file = f"{self.data_file}.tmp"
+        with open(temp_file, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.data_file)
+
+        self.close()
+        self._snapshot_digest = hashlib.sha1(data).hexdigest()
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+        self.journal_records = 0
+        self._keys = {id(component): key for key, component in enumerate(components)}
+        self._next_key = len(components)
+
+    def compact(self, components):
+        """Folds the journal back into the snapshot if it holds any records."""
+        if self.journal_records or self._snapshot_digest is None:
+            self.write_snapshot(components)
+
+    def backup(self, backup_dir, timestamp):
+        name, ext = os.path.splitext(os.path.basename(self.data_file))
+        backup_path = os.path.join(backup_dir, f"{name}_{timestamp}{ext}")
+        shutil.copy2(self.data_file, backup_path)
+        if os.path.exists(self.journal_file):
+            shutil.copy2(self.journal_file, f"{backup_path}.journal")
+        return backup_path
+
+    def close(self):
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except OSError:
+                pass
+            self._journal = None
+
+    def _append(self, records):
+        if self._journal is None:
+            needs_header = not os.path.exists(self.journal_file) or os.path.getsize(self.journal_file) == 0
+            self._journal = open(self.journal_file, "ab")
+            if needs_header:
+                records = [{"op": "base", "digest": self._snapshot_digest}] + records
+        payload = "".join(json.dumps(record) + "\n" for record in records)
+        self._journal.write(payload.encode("utf-8"))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.journal_records += sum(1 for record in records if record["op"] != "base")
+
+    def _replay(self, components, keyed):
+        try:
+            with open(self.journal_file, "rb") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return 0
+        if not lines:
+            return 0
+
+        try:
+            header = json.loads(lines[0])
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            header = {}
+        if header.get("op") != "base" or header.get("digest") != self._snapshot_digest:
+            # Either written against an older snapshot (already compacted) or unreadable.
+            logger.info("Discarding stale catalogue journal: %s", self.journal_file)
+            os.remove(self.journal_file)
+            return 0
+
+        applied = 0
+        valid_length = len(lines[0])
+        for line in lines[1:]:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete journal record")
+                record = json.loads(line)
+            except (ValueError, UnicodeDecodeError):
+                logger.warning("Truncating torn record at the end of %s", self.journal_file)
+                with open(self.journal_file, "r+b") as file:
+                    file.truncate(valid_length)
+                break
+            self._apply_record(components, keyed, record)
+            valid_length += len(line)
+            applied += 1
+        return applied
+
+    def _apply_record(self, components, keyed, record):
+        op = record.get("op")
+        key = record.get("key")
+        if op == "insert":
+            component = record["component"]
+            components.insert(record.get("index", 0), component)
+            keyed[key] = component
+            self._next_key = max(self._next_key, key + 1)
+        elif op == "update":
+            target = keyed.get(key)
+            if target is None:
+                logger.warning("Skipping journal update for unknown key %s", key)
+                return
+            target.clear()
+            target.update(record["component"])
+        elif op == "delete":
+            target = keyed.pop(key, None)
+            if target is None:
+                logger.warning("Skipping journal delete for unknown key %s", key)
+                return
+            index = record.get("index")
+            if index is not None and 0 <= index < len(components) and components[index] is target:
+                components.pop(index)
+            else:
+                for position, component in enumerate(components):
+                    if component is target:
+                        components.pop(position)
+                        break
+
+
+class SqliteCatalogueStore:
+    """
+    Keeps the component catalogue in an indexed SQLite table (WAL mode) next
+    to the configured catalogue file (``component_catalogue.db`` for
+    ``component_catalogue.json``). Each mutation touches only its own row.
+
+    The in-memory catalogue order is kept through a REAL ``sort_key`` column;
+    parts added at the front of the list get a key below the current minimum.
+    """
+
+    engine = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS components (
+        id INTEGER PRIMARY KEY,
+        sort_key REAL NOT NULL,
+        part_number TEXT,
+        manufacturer_number TEXT,
+        location TEXT,
+        type TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_components_sort_key ON components (sort_key);
+    CREATE INDEX IF NOT EXISTS idx_components_part_number ON components (part_number);
+    CREATE INDEX IF NOT EXISTS idx_components_manufacturer_number ON components (manufacturer_number);
+    CREATE INDEX IF NOT EXISTS idx_components_location ON components (location);
+    CREATE INDEX IF NOT EXISTS idx_components_type ON components (type);
+    CREATE TABLE IF NOT EXISTS catalogue_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, data_file, db_file=None):
+        self.data_file = data_file
+        self.db_file = db_file or f"{os.path.splitext(data_file)[0]}.db"
+        self.conn = None
+        self._keys = {}
+        self._rows = []
+        self._order = []
+
+    def open(self):
+        if self.conn is None:
+            folder = os.path.dirname(self.db_file)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder, exist_ok=True)
+            self.conn = sqlite3.connect(self.db_file)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(self.SCHEMA)
+        return self.conn
+
+    def load(self):
+        self.close()
+        conn = self.open()
+        if not self._is_initialized():
+            # First use of the database: bring over the existing JSON catalogue.
+            logger.info("Migrating JSON catalogue %s into %s", self.data_file, self.db_file)
+            self.write_snapshot(JsonCatalogueStore(self.data_file).load())
+
+        components = []
+        self._keys = {}
+        self._rows = []
+        self._order = []
+        for row_id, sort_key, data in conn.execute("SELECT id, sort_key, data FROM components ORDER BY sort_key, id"):
+            try:
+                component = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning("Skipping unreadable catalogue row %s in %s", row_id, self.db_file)
+                continue
+            components.append(component)
+            self._keys[id(component)] = row_id
+            self._rows.append(row_id)
+            self._order.append(sort_key)
+        return components
+
+    def apply(self, changes, components):
+        if self.conn is None:
+            self.write_snapshot(components)
+            return
+        try:
+            with self.conn:
+                for change in changes:
+                    self._apply_change(change)
+        except KeyError:
+            logger.warning("Catalogue database is out of sync with memory; rewriting all rows.")
+            self.write_snapshot(components)
+
+    def write_snapshot(self, components):
+        conn = self.open()
+        self._keys = {}
+        self._rows = []
+        self._order = list(range(len(components)))
+        with conn:
+            conn.execute("DELETE FROM components")
+            for sort_key, component in enumerate(components):
+                cursor = conn.execute(
+                    "INSERT INTO components (sort_key, part_number, manufacturer_number, location, type, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (sort_key, *self._columns(component)),
+                )
+                self._keys[id(component)] = cursor.lastrowid
+                self._rows.append(cursor.lastrowid)
+            conn.execute("INSERT OR REPLACE INTO catalogue_meta (key, value) VALUES ('initialized', '1')")
+
+    def compact(self, components):
+        if self.conn is not None:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def backup(self, backup_dir, timestamp):
+        name, _ = os.path.splitext(os.path.basename(self.db_file))
+        backup_path = os.path.join(backup_dir, f"{name}_{timestamp}.db")
+        # Runs on the backup timer thread, so use connections of its own.
+        source = sqlite3.connect(self.db_file)
+        target = sqlite3.connect(backup_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return backup_path
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+            self.conn = None
+
+    def _is_initialized(self):
+        row = self.conn.execute("SELECT value FROM catalogue_meta WHERE key = 'initialized'").fetchone()
+        return row is not None
+
+    def _columns(self, component):
+        part_info = component.get("part_info", {})
+        return (
+            str(part_info.get("part_number", "")),
+            str(part_info.get("manufacturer_number", "")),
+            str(part_info.get("location", "")),
+            str(part_info.get("type", "")),
+            json.dumps(component),
+        )
+
+    def _apply_change(self, change):
+        op = change["op"]
+        component = change["component"]
+        if op == "insert":
+            index = min(max(change["index"], 0), len(self._order))
+            sort_key = self._sort_key_for(index)
+            cursor = self.conn.execute(
+                "INSERT INTO components (sort_key, part_number, manufacturer_number, location, type, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sort_key, *self._columns(component)),
+            )
+            self._keys[id(component)] = cursor.lastrowid
+            self._rows.insert(index, cursor.lastrowid)
+            self._order.insert(index, sort_key)
+        elif op == "update":
+            previous = change.get("previous", component)
+            row_id = self._keys.pop(id(previous))
+            self._keys[id(component)] = row_id
+            self.conn.execute(
+                "UPDATE components SET part_number = ?, manufacturer_number = ?, location = ?, type = ?, data = ? "
+                "WHERE id = ?",
+                (*self._columns(component), row_id),
+            )
+        elif op == "delete":
+            row_id = self._keys.pop(id(component))
+            self.conn.execute("DELETE FROM components WHERE id = ?", (row_id,))
+            index = change.get("index")
+            if index is None or not (0 <= index < len(self._rows)) or self._rows[index] != row_id:
+                index = self._rows.index(row_id)
+            self._rows.pop(index)
+            self._order.pop(index)
+        else:
+            raise ValueError(f"Unknown catalogue change: {op}")
+
+    def _sort_key_for(self, index):
+        if not self._order:
+            return 0.0
+        if index == 0:
+            return self._order[0] - 1.0
+        if index >= len(self._order):
+            return self._order[-1] + 1.0
+        before, after = self._order[index - 1], self._order[index]
+        middle = (before + after) / 2
+        if before < middle < after:
+            return middle
+        # Ran out of float precision between neighbours: spread the keys out again.
+        self._order = [float(position) for position in range(len(self._rows))]
+        self.conn.executemany(
+            "UPDATE components SET sort_key = ? WHERE id = ?",
+            [(position, row_id) for position, row_id in enumerate(self._rows)],
+        )
+        return index - 0.5
@@ -1,32 +1,337 @@
 from image_cache import ImageCache, ImageCacheEntry
+from product_cache import ProductCache, cache_key
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import requests
+import email.utils
 import logging
 import json
 import os
+import threading
 import time
 
 logger = logging.getLogger(__name__)
-
+
+POOL_MAXSIZE = 4        # kept-alive connections per host
+TIMING_HISTORY = 200    # request timings kept for timing_summary()
+
+# DigiKey's Product Information API allows 120 requests per minute
+RATE_LIMIT_PER_MINUTE = 120
+RATE_LIMIT_BURST = 10
+MAX_RATE_LIMIT_RETRIES = 3
+DEFAULT_RETRY_AFTER = 5.0
+MAX_RETRY_AFTER = 60.0
+BULK_WORKERS = POOL_MAXSIZE
+
+# The access token is saved between runs and renewed this long before it expires
+TOKEN_REFRESH_MARGIN = 60.0
+TOKEN_RETRY_DELAY = 30.0      # first retry after a failed renewal, doubled per failure
+TOKEN_RETRY_MAX_DELAY = 900.0
+
+# Connection setup (TCP connect plus TLS handshake) done by this thread's current request
+_connect_timer = threading.local()
+
+
+def _timed_connection(connection_cls):
+    class TimedConnection(connection_cls):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _connect_timer.seconds = getattr(_connect_timer, "seconds", 0.0) + time.perf_counter() - started
+                _connect_timer.count = getattr(_connect_timer, "count", 0) + 1
+
+    TimedConnection.__name__ = f"Timed{connection_cls.__name__}"
+    return TimedConnection
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _timed_connection(HTTPConnection)
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _timed_connection(HTTPSConnection)
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections record how long connecting took."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per `per` seconds on average, in bursts of up to
+    `capacity`. acquire() blocks until a call is allowed; hold() makes every
+    caller wait, for when the server says to back off.
+    """
+
+    def __init__(self, rate, per=60.0, capacity=RATE_LIMIT_BURST):
+        self.fill_rate = rate / per
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._hold_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if now < self._hold_until:
+                    wait = self._hold_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+    def hold(self, seconds):
+        with self._lock:
+            self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one: the first caller
+    runs the function and every caller that arrives while it is running
+    waits for, and gets, the same result or exception.
+    """
+
+    def __init__(self):
+        self.shared = 0   # calls answered by another caller's request
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = function()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def _retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header, either delta-seconds or an HTTP date."""
+    value = str(value or "").strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    if value:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return min(max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_RETRY_AFTER
+
+
+@dataclass
+class RequestTiming:
+    method: str
+    host: str
+    status: int | None
+    new_connection: bool
+    connect_seconds: float   # TCP connect + TLS handshake, 0 on a reused connection
+    server_seconds: float    # request sent until response headers arrived
+    total_seconds: float     # including reading the body
+
 
 
 class Digikey_API_Call:
     ACCESS_TOKEN: str
     def __init__(self, show_errors=True, error_reporter=None):
         self.config_file = os.path.join(os.path.dirname(__file__), "Databases", "config.json")
+        self.token_file = os.path.join(os.path.dirname(__file__), "Databases", "digikey_token.json")
         self.image_cache = ImageCache()
+        self.product_cache = ProductCache()
         self.show_errors = show_errors
         self.error_reporter = error_reporter
+        # last_error is per thread so concurrent lookups each see their own
+        self._thread_state = threading.local()
         self.last_error = ""
         self.TOKEN_EXPIRES = 0
+        self.rate_limiter = TokenBucket(RATE_LIMIT_PER_MINUTE)
+        # One keep-alive session per host, so the API and the image CDN keep their own pools
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self.last_timing = None
+        self.request_timings = deque(maxlen=TIMING_HISTORY)
+        # Background refreshes of stale product cache entries
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="DigikeyRefresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        # Identical token, part and image requests in flight at once are sent only once
+        self._single_flight = SingleFlight()
+        # Renews the token shortly before TOKEN_EXPIRES so lookups never wait for it
+        self._token_changed = threading.Event()
+        self._closed = threading.Event()
+        self._token_refresher = None
+        # Set when DigiKey answers 401 for the configured credentials; the
+        # refresher then waits for load_config() instead of retrying them.
+        self._credentials_rejected = False
         self.load_config()
 
+    @property
+    def last_error(self):
+        return getattr(self._thread_state, "last_error", "")
+
+    @last_error.setter
+    def last_error(self, value):
+        self._thread_state.last_error = value
+
+    @property
+    def coalesced_requests(self):
+        """How many calls were answered by an identical request already in flight."""
+        return self._single_flight.shared
+
+    def _shared(self, key, function, *args):
+        """
+        Run function(*args) once for all concurrent callers with the same key.
+        Every caller gets its result, and its last_error in their own thread.
+        """
+        def call():
+            self.last_error = ""
+            result = function(*args)
+            return result, self.last_error
+
+        result, error = self._single_flight.do(key, call)
+        self.last_error = error
+        return result
+
     def _report_error(self, title, message):
         self.last_error = message
         logger.error("%s: %s", title, message)
         if self.show_errors and self.error_reporter:
             self.error_reporter(title, message)
 
+    def _session_for(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+        return session, host
+
+    def _request(self, method, url, rate_limited=False, **kwargs):
+        """
+        Send a request on the host's pooled session and record a RequestTiming
+        for it. A rate-limited request first waits for the token bucket, and
+        on a 429 every rate-limited caller backs off for the Retry-After time
+        before it is sent again.
+        """
+        session, host = self._session_for(url)
+        attempt = 0
+        while True:
+            if rate_limited:
+                self.rate_limiter.acquire()
+            response = self._send(session, host, method, url, **kwargs)
+            if not rate_limited or response.status_code != 429 or attempt >= MAX_RATE_LIMIT_RETRIES:
+                return response
+            attempt += 1
+            delay = _retry_after_seconds(response.headers.get("Retry-After"))
+            logger.warning("DigiKey rate limit hit; retrying in %.1f s", delay)
+            self.rate_limiter.hold(delay)
+
+    def _send(self, session, host, method, url, **kwargs):
+        _connect_timer.seconds = 0.0
+        _connect_timer.count = 0
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record_timing(method, host, None, started, None)
+            raise
+        self._record_timing(method, host, response.status_code, started, response.elapsed.total_seconds())
+        return response
+
+    def _record_timing(self, method, host, status, started, elapsed):
+        total = time.perf_counter() - started
+        connect = _connect_timer.seconds
+        timing = RequestTiming(
+            method=method,
+            host=host,
+            status=status,
+            new_connection=_connect_timer.count > 0,
+            connect_seconds=connect,
+            server_seconds=max((elapsed if elapsed is not None else total) - connect, 0.0),
+            total_seconds=total,
+        )
+        self.last_timing = timing
+        self.request_timings.append(timing)
+        logger.debug(
+            "%s %s -> %s in %.0f ms (connect %.0f ms, server %.0f ms)",
+            method, host, status, total * 1000, connect * 1000, timing.server_seconds * 1000,
+        )
+
+    def timing_summary(self):
+        """Per-host request counts and average connect/server/total seconds over recent requests."""
+        summary = {}
+        for timing in list(self.request_timings):
+            stats = summary.setdefault(timing.host, {"requests": 0, "new_connections": 0, "connect": 0.0, "server": 0.0, "total": 0.0})
+            stats["requests"] += 1
+            stats["new_connections"] += timing.new_connection
+            stats["connect"] += timing.connect_seconds
+            stats["server"] += timing.server_seconds
+            stats["total"] += timing.total_seconds
+        return {
+            host: {
+                "requests": stats["requests"],
+                "new_connections": stats["new_connections"],
+                "average_connect_seconds": stats["connect"] / stats["new_connections"] if stats["new_connections"] else 0.0,
+                "average_server_seconds": stats["server"] / stats["requests"],
+                "average_total_seconds": stats["total"] / stats["requests"],
+            }
+            for host, stats in summary.items()
+        }
+
+    def close(self):
+        """Stop background refreshes and close the pooled connections."""
+        self._closed.set()
+        self._token_changed.set()
+        self._refresher.shutdown(wait=False, cancel_futures=True)
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
     def load_config(self):
         """Loads API configuration from config.json"""
         self.ACCESS_TOKEN = None
@@ -42,12 +347,99 @@ class Digikey_API_Call:
                 if not self.CLIENT_SECRET:
                     raise ValueError("Digikey Client Secret is missing in config.json")
                 
-        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
             self._report_error("Configuration Error", f"Failed to load config.json:\n{e}")
             self.CLIENT_ID = None
             self.CLIENT_SECRET = None
+            return
+        self._credentials_rejected = False
+        self._load_saved_token()
+        # Without a usable saved token, fetch one now rather than on the first lookup
+        self._start_token_refresher()
+        self._token_changed.set()
+
+    def _load_saved_token(self):
+        """Reuse the token saved by an earlier run if it belongs to this client ID and is still valid."""
+        try:
+            with open(self.token_file, "r") as file:
+                saved = json.load(file)
+            expires = float(saved["expires_at"])
+            token = saved["access_token"]
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError) as e:
+            logger.warning("Ignoring unreadable saved DigiKey token: %s", e)
+            return
+        if saved.get("client_id") != self.CLIENT_ID or expires - TOKEN_REFRESH_MARGIN <= time.time():
+            return
+        self._set_token(token, expires, save=False)
+
+    def _save_token(self):
+        """Write the token where only this user can read it (mode 0600), replacing the old file atomically."""
+        temporary = f"{self.token_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
+            # Windows ignores these mode bits (and chmod below beyond read-only), so
+            # there the file is only as private as the Databases folder's ACLs.
+            descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w") as file:
+                json.dump({
+                    "client_id": self.CLIENT_ID,
+                    "access_token": self.ACCESS_TOKEN,
+                    "expires_at": self.TOKEN_EXPIRES,
+                }, file)
+            os.chmod(temporary, 0o600)
+            os.replace(temporary, self.token_file)
+        except OSError as e:
+            logger.warning("Could not save the DigiKey token: %s", e)
+
+    def _set_token(self, token, expires, save=True):
+        self.ACCESS_TOKEN = token
+        self.TOKEN_EXPIRES = expires
+        if save:
+            self._save_token()
+        self._start_token_refresher()
+        self._token_changed.set()
+
+    def _start_token_refresher(self):
+        if self._token_refresher is None and not self._closed.is_set():
+            self._token_refresher = threading.Thread(target=self._token_refresh_loop, name="DigikeyToken", daemon=True)
+            self._token_refresher.start()
+
+    def _token_refresh_loop(self):
+        failures = 0
+        while not self._closed.is_set():
+            self._token_changed.clear()
+            if not self.CLIENT_ID or not self.CLIENT_SECRET or self._credentials_rejected:
+                failures = 0
+                self._token_changed.wait()
+                continue
+            wait = self.TOKEN_EXPIRES - TOKEN_REFRESH_MARGIN - time.time() if self.ACCESS_TOKEN else 0
+            if wait > 0:
+                self._token_changed.wait(wait)
+                continue
+            expires = self.TOKEN_EXPIRES
+            try:
+                self.refresh_access_token()
+            except Exception as e:
+                if failures:
+                    logger.warning("Background DigiKey token refresh failed again: %s", e)
+                else:
+                    logger.exception("Background DigiKey token refresh failed")
+            if self.TOKEN_EXPIRES != expires:
+                failures = 0
+                continue
+            failures += 1
+            delay = min(TOKEN_RETRY_DELAY * 2 ** (failures - 1), TOKEN_RETRY_MAX_DELAY)
+            # New credentials from load_config() (or close()) end the wait early
+            if self._token_changed.wait(delay):
+                failures = 0
 
     def refresh_access_token(self):
+        """Gets a new access token; callers that overlap share one token request."""
+        self._shared("token", self._refresh_access_token)
+
+    def _refresh_access_token(self):
         #Check if we have a client id and secret.
         if not self.CLIENT_ID or not self.CLIENT_SECRET:
             self._report_error("API Error", "Missing Digikey client ID or secret!")
@@ -61,16 +453,17 @@ class Digikey_API_Call:
         }
         
         try:
-            tokenRequest = requests.post("https://api.digikey.com/v1/oauth2/token", data=digiKeyAuth)
+            tokenRequest = self._request("POST", "https://api.digikey.com/v1/oauth2/token", data=digiKeyAuth)
             tokenRequest.raise_for_status()
         except requests.exceptions.HTTPError as http_error:
             #Should return as a 401 error, I think it's safe to assume that the credentials are invalid.
+            if http_error.response is not None and http_error.response.status_code == 401:
+                self._credentials_rejected = True
             self._report_error("Bad Credentials", "Credentials entered in config.json are not valid.")
             return None
 
 
-        self.ACCESS_TOKEN = tokenRequest.json()["access_token"]
-        self.TOKEN_EXPIRES = time.time() + tokenRequest.json()["expires_in"]
+        self._set_token(tokenRequest.json()["access_token"], time.time() + tokenRequest.json()["expires_in"])
         self.last_error = ""
 
     def _handle_digikey_error(self, http_error):
@@ -105,6 +498,10 @@ class Digikey_API_Call:
         return None
 
     def fetch_image_data(self, photo_url: str, part_number: str):
+        key = ("image", cache_key(part_number), photo_url)
+        return self._shared(key, self._fetch_image_data, photo_url, part_number)
+
+    def _fetch_image_data(self, photo_url: str, part_number: str):
         cache_entry = self.image_cache.request_entry(part_number=part_number.strip())
         if cache_entry:
             headers = {
@@ -118,7 +515,7 @@ class Digikey_API_Call:
                     "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
             }
 
-        response = requests.get(photo_url, headers=headers, timeout=5)
+        response = self._request("GET", photo_url, headers=headers, timeout=5)
         if response.status_code == 304: # the etag matches so just return the cached entry
             return cache_entry
         elif response.status_code == 200: 
@@ -140,8 +537,56 @@ class Digikey_API_Call:
                                                                                     response.status_code)
 
 
-    def fetch_part_details(self, part_number: str):
-        """Fetches part details from the API"""
+    def fetch_part_details(self, part_number: str):
+        """
+        Fetches part details, from the product cache when it has the part.
+        A stale cache entry is returned straight away and refreshed from the
+        API in the background.
+        """
+        self.last_error = ""
+        entry, fresh = self.product_cache.lookup(part_number)
+        if entry is not None:
+            if not fresh:
+                self._refresh_in_background(part_number)
+            return entry.component
+        return self._search_shared(part_number)
+
+    def _search_shared(self, part_number: str):
+        component = self._shared(("part", cache_key(part_number)), self._search_and_cache, part_number)
+        # Coalesced callers fill in count and location on what they get, so each needs its own copy
+        return deepcopy(component)
+
+    def _search_and_cache(self, part_number: str):
+        component = self._search_part(part_number)
+        # Errors are not cached; a found part or a definite "no match" is
+        if not self.last_error:
+            self.product_cache.store(part_number, component)
+        return component
+
+    def _refresh_in_background(self, part_number: str):
+        key = cache_key(part_number)
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._search_shared(part_number)
+            except Exception:
+                logger.exception("Background refresh of %s failed", part_number)
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        try:
+            self._refresher.submit(refresh)
+        except RuntimeError:  # shut down
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+
+    def _search_part(self, part_number: str):
+        """Runs the keyword search against the API"""
         self.last_error = ""
         # Check that we have a token and that it is not expired.
         if not self.ACCESS_TOKEN or time.time() > self.TOKEN_EXPIRES:
@@ -168,9 +613,10 @@ class Digikey_API_Call:
 
         try:
             logger.debug("Requesting the data model from digikey.")
-            response = requests.post('https://api.digikey.com/products/v4/search/keyword', 
-                                     data=json.dumps(searchParams), 
-                                     headers=searchHeaders, 
+            response = self._request("POST", 'https://api.digikey.com/products/v4/search/keyword',
+                                     rate_limited=True,
+                                     data=json.dumps(searchParams),
+                                     headers=searchHeaders,
                                      timeout=5)
             
             response.raise_for_status()  # Raise error for HTTP issues
@@ -224,3 +670,36 @@ class Digikey_API_Call:
         except requests.exceptions.RequestException as req_error:
             self._report_error("Connection Error", f"A network error happened: \n{str(req_error)}")
 
+    def fetch_part_details_bulk(self, part_numbers, max_workers=BULK_WORKERS):
+        """
+        Look up several part numbers on a pool of worker threads, sharing the
+        rate limiter. Yields (position in part_numbers, component, error) as
+        each lookup finishes, so results arrive in completion order; a failed
+        lookup yields its own error message instead of stopping the batch.
+        """
+        part_numbers = list(part_numbers)
+        if not part_numbers:
+            return
+        # Refresh the token once up front rather than in every worker at the same time
+        if not self.ACCESS_TOKEN or time.time() > self.TOKEN_EXPIRES:
+            self.refresh_access_token()
+
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="DigikeyLookup")
+        try:
+            futures = {
+                pool.submit(self._lookup_for_bulk, part_number): position
+                for position, part_number in enumerate(part_numbers)
+            }
+            for future in as_completed(futures):
+                component, error = future.result()
+                yield futures[future], component, error
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _lookup_for_bulk(self, part_number):
+        try:
+            component = self.fetch_part_details(part_number)
+        except Exception as exc:
+            logger.exception("DigiKey lookup for %s failed", part_number)
+            return None, str(exc)
+        return component, self.last_error if component is None else ""
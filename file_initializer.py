@@ -6,21 +6,31 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+SERIAL_PROTOCOLS = ("auto", "legacy")
+
 class FileInitializer:
     DEFAULT_CONFIG = {
         "API": {
             "DIGIKEY_CLIENT_ID": "",
             "DIGIKEY_CLIENT_SECRET": "",
+            "PRODUCT_CACHE_TTL_HOURS": "",
         },
         "SERIAL": {
             "PORT": "",
             "BAUDRATE": "",
             "TIMEOUT": "",
+            "PROTOCOL": "",
+        },
+        "LAYOUT": {
+            "ROWS": "",
+            "COLUMNS": "",
+            "WIRING": "",
         },
         "FILES": {
             "COMPONENT_CATALOGUE": "",
             "CHANGELOG": "",
             "IMAGE_CACHE": "",
+            "STORAGE_ENGINE": "",
         },
     }
 
@@ -123,6 +133,14 @@ class FileInitializer:
             fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """)
+        # DigiKey keyword-search results by normalized part number; see product_cache.py
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_cache (
+            part_number TEXT PRIMARY KEY,
+            component TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+        """)
         conn.commit()
         conn.close()
 
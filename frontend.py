@@ -1,4 +1,14 @@
-from PyQt6.QtCore import QObject, Qt, QThread, pyqtSignal
+from PyQt6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QSortFilterProxyModel,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+    pyqtSlot,
+)
 from PyQt6.QtGui import QColor, QKeySequence, QPalette, QPen, QShortcut
 from PyQt6.QtWidgets import (
     QAbstractItemView,
@@ -22,6 +32,7 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QScrollArea,
     QStackedWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QTextEdit,
@@ -32,12 +43,18 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 from copy import deepcopy
-import difflib
+import logging
 import os
 import webbrowser
-from file_initializer import FileInitializer
+from catalogue_index import SearchCancelled
+from catalogue_store import STORAGE_ENGINES
+from file_initializer import SERIAL_PROTOCOLS, FileInitializer
 from image_cache import ImageCache
+from led_layout import WIRING_ORDERS, LedLayout
+from product_cache import ProductCache
+
 
+logger = logging.getLogger(__name__)
 
 BOM_ROW_BACKGROUND_ROLE = Qt.ItemDataRole.UserRole + 1
 BOM_ROW_FOREGROUND_ROLE = Qt.ItemDataRole.UserRole + 2
@@ -99,6 +116,8 @@ def find_component_index(backend, target_component):
 
 
 class MainWindow(QMainWindow):
+    led_status_changed = pyqtSignal()
+
     def __init__(self, backend, digikey_api=None, initializer=None):
         super().__init__()
         self.backend = backend
@@ -186,12 +205,18 @@ class MainWindow(QMainWindow):
         self.home_page = HomePage(self.backend)
         self.inventory_page = InventoryPage(self.backend)
         self.add_page = AddPartPage(self.backend, self.digikey_api)
-        self.add_page.part_added.connect(self.refresh_all_pages)
-        self.home_page.bom_processed.connect(self.refresh_all_pages)
-        self.inventory_page.component_deleted.connect(self.refresh_all_pages)
         self.inventory_page.undo_requested.connect(self.undo_last_deletion)
-        self.add_page.component_deleted.connect(self.refresh_all_pages)
         self.add_page.undo_requested.connect(self.undo_last_deletion)
+        # Pages are patched from backend change events; hidden pages are only
+        # marked stale and refreshed when they are shown.
+        self.stale_pages = set()
+        self.backend.subscribe(self.handle_catalogue_changes)
+        # The LED controller reports connection changes from its own threads;
+        # the signal hops them onto the GUI thread.
+        self.led_status_changed.connect(self.home_page.refresh_led_status)
+        led_controller = getattr(self.backend, "ledControl", None)
+        if hasattr(led_controller, "add_status_listener"):
+            led_controller.add_status_listener(self.handle_led_status)
 
         self.pages.addWidget(self.home_page)
         self.pages.addWidget(self.inventory_page)
@@ -204,7 +229,7 @@ class MainWindow(QMainWindow):
         self.nav.currentRowChanged.connect(self.pages.setCurrentIndex)
         self.nav.currentRowChanged.connect(self.refresh_current_page)
         for table in (self.home_page.table, self.inventory_page.table, self.add_page.recent_table):
-            table.itemDoubleClicked.connect(self.show_component_details)
+            table.componentDoubleClicked.connect(self.show_component_details)
         self.nav.setCurrentRow(0)
         self.test_mode_shortcut = QShortcut(QKeySequence("Ctrl+Alt+T"), self)
         self.test_mode_shortcut.activated.connect(self.toggle_test_mode)
@@ -342,6 +367,11 @@ class MainWindow(QMainWindow):
                 color: #664d03;
                 border: 1px solid #ffecb5;
             }
+            QLabel#ledStatusBadge[statusState="connecting"] {
+                background: #cfe2ff;
+                color: #084298;
+                border: 1px solid #b6d4fe;
+            }
             QLabel#ledStatusDetail {
                 color: #5d6a75;
                 font-size: 12px;
@@ -592,31 +622,42 @@ class MainWindow(QMainWindow):
 
     def refresh_current_page(self, index):
         page = self.pages.widget(index)
-        refresh = getattr(page, "refresh", None)
-        if refresh:
-            refresh()
+        if page in self.stale_pages:
+            self.stale_pages.discard(page)
+            page.refresh()
+        elif page is self.home_page:
+            self.home_page.refresh_led_status()
+
+    def closeEvent(self, event):
+        self.backend.unsubscribe(self.handle_catalogue_changes)
+        led_controller = getattr(self.backend, "ledControl", None)
+        if hasattr(led_controller, "remove_status_listener"):
+            led_controller.remove_status_listener(self.handle_led_status)
+        self.inventory_page.stop_search_thread()
+        super().closeEvent(event)
 
-    def refresh_all_pages(self):
+    def handle_led_status(self, _status):
+        self.led_status_changed.emit()
+
+    def handle_catalogue_changes(self, events):
+        current = self.pages.currentWidget()
         for page in (self.home_page, self.inventory_page, self.add_page):
-            refresh = getattr(page, "refresh", None)
-            if refresh:
-                refresh()
+            if page is current:
+                page.apply_catalogue_changes(events)
+            else:
+                self.stale_pages.add(page)
 
-    def show_component_details(self, item):
-        table = item.tableWidget()
-        component = table.component_for_row(item.row()) if table else None
+    def show_component_details(self, component):
         if not component:
             return
 
         dialog = ComponentDetailsDialog(component, self.backend, self)
-        dialog.saved.connect(self.refresh_all_pages)
         dialog.exec()
 
     def open_settings_dialog(self):
         dialog = SettingsDialog(self.initializer, self.backend, self.digikey_api, self)
         dialog.config_saved.connect(self.handle_config_saved)
-        dialog.availability_changed.connect(self.refresh_all_pages)
-        dialog.finished.connect(lambda _result: self.refresh_all_pages())
+        dialog.finished.connect(lambda _result: self.home_page.refresh_led_status())
         dialog.exec()
 
     def open_help_dialog(self):
@@ -624,7 +665,6 @@ class MainWindow(QMainWindow):
 
     def undo_last_deletion(self):
         if self.backend.undo_delete():
-            self.refresh_all_pages()
             QMessageBox.information(self, "Undo Delete", "Last deletion undone.")
         else:
             QMessageBox.information(self, "Undo Delete", "No deletion to undo.")
@@ -645,7 +685,6 @@ class MainWindow(QMainWindow):
             self.backend.data_file = self.production_data_file
             self.backend.load_components()
         self.backend.undo_stack.clear()
-        self.refresh_all_pages()
         self._update_test_mode_ui()
 
     def toggle_test_mode(self):
@@ -661,7 +700,6 @@ class MainWindow(QMainWindow):
 
         self.backend.load_components()
         self.backend.undo_stack.clear()
-        self.refresh_all_pages()
         self._update_test_mode_ui()
         QMessageBox.information(self, "Test Mode", message)
 
@@ -765,14 +803,39 @@ class HomePage(QWidget):
         self.refresh()
 
     def refresh(self):
-        stats = self.backend.get_statistics()
-        low_stock_components = self.backend.get_low_stock_components()
+        self.refresh_metrics()
+        self.refresh_led_status()
+        self.table.set_components(self.backend.get_low_stock_components())
 
+    def refresh_metrics(self):
+        stats = self.backend.get_statistics()
         self.total_parts.set_value(str(stats["total_parts"]))
-        self.low_stock.set_value(str(len(low_stock_components)))
+        self.low_stock.set_value(str(self.backend.get_low_stock_count()))
         self.type_count.set_value(str(len(stats["types"])))
-        self.refresh_led_status()
-        self.table.set_components(low_stock_components)
+
+    def apply_catalogue_changes(self, events):
+        if any(event["type"] == "bulk" for event in events):
+            self.refresh()
+            return
+
+        self.refresh_metrics()
+        model = self.table.component_model
+        rows_changed = False
+        for event in events:
+            component = event["component"]
+            listed = model.row_for_component(component) >= 0
+            if event["type"] == "removed":
+                rows_changed = rows_changed or listed
+                continue
+            previous = event.get("previous", component)
+            if previous is not component and model.row_for_component(previous) >= 0:
+                rows_changed = True
+            elif listed != self.backend.is_low_stock(component):
+                rows_changed = True
+            elif listed:
+                model.component_changed(component)
+        if rows_changed:
+            self.table.set_components(self.backend.get_low_stock_components())
 
     def refresh_led_status(self):
         led_controller = getattr(self.backend, "ledControl", None)
@@ -787,7 +850,7 @@ class HomePage(QWidget):
 
         label = str(status.get("label", "Unavailable"))
         state = "connected" if status.get("connected") else label.strip().lower()
-        if state not in {"connected", "disconnected", "unavailable"}:
+        if state not in {"connected", "connecting", "disconnected", "unavailable"}:
             state = "disconnected"
 
         self.led_status_badge.setText(label)
@@ -875,6 +938,9 @@ class HomePage(QWidget):
 class InventoryPage(QWidget):
     component_deleted = pyqtSignal()
     undo_requested = pyqtSignal()
+    search_requested = pyqtSignal(int, str)
+
+    SEARCH_DEBOUNCE_MS = 150
 
     def __init__(self, backend):
         super().__init__()
@@ -905,7 +971,23 @@ class InventoryPage(QWidget):
         self.table = ComponentTable()
         layout.addWidget(self.table, 1)
 
-        self.search_input.textChanged.connect(self.refresh)
+        # Searches run on a worker thread; only the newest request is applied.
+        self.search_generation = 0
+        self.showing_all_components = False
+        self.search_thread = QThread(self)
+        self.search_worker = InventorySearchWorker(self.backend.search_session())
+        self.search_worker.moveToThread(self.search_thread)
+        self.search_requested.connect(self.search_worker.search)
+        self.search_worker.finished.connect(self.handle_search_finished)
+        self.search_thread.finished.connect(self.search_worker.deleteLater)
+        self.search_thread.start()
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.refresh)
+
+        self.search_input.textChanged.connect(self.search_timer.start)
         self.search_input.returnPressed.connect(self.refresh)
         self.refresh_button.clicked.connect(self.refresh)
         self.delete_button.clicked.connect(self.delete_selected_component)
@@ -914,12 +996,51 @@ class InventoryPage(QWidget):
         self.refresh()
 
     def refresh(self):
+        self.search_timer.stop()
+        self.search_generation += 1
+        self.search_worker.latest_generation = self.search_generation
         query = self.search_input.text().strip()
+        self.showing_all_components = not query
         if query:
-            components = self.backend.search_components(query)
+            self.search_requested.emit(self.search_generation, query)
         else:
-            components = self.backend.get_all_components()
-        self.table.set_components(components)
+            self.table.set_components(self.backend.get_all_components())
+
+    def apply_catalogue_changes(self, events):
+        # Search results may gain or lose rows on any change; only the
+        # unfiltered list can be patched row by row.
+        if (
+            not self.showing_all_components
+            or self.search_timer.isActive()
+            or any(event["type"] == "bulk" for event in events)
+        ):
+            self.refresh()
+            return
+
+        model = self.table.component_model
+        for event in events:
+            component = event["component"]
+            if event["type"] == "added":
+                model.insert_component(event.get("index", 0), component)
+            elif event["type"] == "removed":
+                model.remove_component(component)
+            else:
+                previous = event.get("previous", component)
+                if previous is component:
+                    model.component_changed(component)
+                else:
+                    model.replace_component(previous, component)
+        if model.rowCount() != len(self.backend.get_all_components()):
+            self.refresh()
+
+    def handle_search_finished(self, generation, components):
+        if generation == self.search_generation:
+            self.table.set_components(components)
+
+    def stop_search_thread(self):
+        self.search_worker.latest_generation = -1
+        self.search_thread.quit()
+        self.search_thread.wait()
 
     def delete_selected_component(self):
         component = self.table.selected_component()
@@ -984,6 +1105,7 @@ class AddPartPage(QWidget):
         self.lookup_thread = None
         self.lookup_worker = None
         self.lookup_context = None
+        self.bulk_context = None
         self.loaded_digikey_component = None
         self.setObjectName("pageRoot")
         self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
@@ -1393,7 +1515,26 @@ class AddPartPage(QWidget):
             "errors": [],
             "possible_duplicates": [],
         }
+        # Hold a vial location for every auto-vial entry up front so the batch
+        # is placed in consecutive free slots; unused ones are released when
+        # the batch finishes.
+        auto_vial_count = sum(1 for entry in entries if entry.get("storage_mode") == self.STORAGE_MODE_AUTO)
+        reserved_locations = self.backend.reserve_locations(auto_vial_count) if auto_vial_count else []
+        try:
+            lookups = self._prepare_bulk_entries(entries, summary)
+        except Exception:
+            if reserved_locations:
+                self.backend.release_locations(reserved_locations)
+            raise
+
+        if lookups:
+            self.start_bulk_lookup(lookups, summary, reserved_locations)
+        else:
+            self._finish_bulk_barcodes(summary, reserved_locations)
 
+    def _prepare_bulk_entries(self, entries, summary):
+        """Decode the barcodes and settle duplicates; returns the (entry, barcode_data) pairs that need a DigiKey lookup."""
+        lookups = []
         for entry in entries:
             try:
                 barcode_data = self.backend.barcode_decoder(entry["barcode"], show_errors=False)
@@ -1412,34 +1553,101 @@ class AddPartPage(QWidget):
             if not self.digikey_api:
                 summary["unmatched"].append(barcode_data.get("part_number", "Unknown"))
                 continue
+            lookups.append((entry, barcode_data))
+        return lookups
 
-            component = self.digikey_api.fetch_part_details(barcode_data["part_number"])
-            error = getattr(self.digikey_api, "last_error", "")
-            if error:
-                summary["errors"].append(f"{barcode_data['part_number']}: {error}")
-                continue
-            if not component:
-                summary["unmatched"].append(barcode_data.get("part_number", "Unknown"))
-                continue
+    def start_bulk_lookup(self, lookups, summary, reserved_locations):
+        self.set_lookup_busy(True)
+        # Give each auto-vial entry its slot now, in scan order, so the order
+        # the lookups happen to finish in cannot reshuffle the locations.
+        available_locations = iter(reserved_locations)
+        locations = {}
+        for position, (entry, _) in enumerate(lookups):
+            if entry.get("storage_mode") == self.STORAGE_MODE_AUTO:
+                locations[position] = next(available_locations, None)
+        self.bulk_context = {
+            "lookups": lookups,
+            "summary": summary,
+            "reserved_locations": reserved_locations,
+            "locations": locations,
+            "results": {},
+            "next_position": 0,
+        }
+        self.lookup_thread = QThread(self)
+        self.lookup_worker = DigikeyBulkLookupWorker(
+            self.digikey_api,
+            [barcode_data["part_number"] for _, barcode_data in lookups],
+        )
+        self.lookup_worker.moveToThread(self.lookup_thread)
+        self.lookup_thread.started.connect(self.lookup_worker.run)
+        self.lookup_worker.result.connect(self.handle_bulk_lookup_result)
+        self.lookup_worker.finished.connect(self.handle_bulk_lookup_finished)
+        self.lookup_worker.finished.connect(self.lookup_thread.quit)
+        self.lookup_worker.finished.connect(self.lookup_worker.deleteLater)
+        self.lookup_thread.finished.connect(self.lookup_thread.deleteLater)
+        self.lookup_thread.finished.connect(self.clear_lookup_thread)
+        self.lookup_thread.start()
 
-            component["part_info"]["count"] = int(barcode_data.get("count", 0))
-            component["metadata"]["low_stock"] = entry["low_stock"]
-            component["part_info"]["location"] = self.resolve_storage_location(
-                entry.get("storage_mode"),
-                bin_location=entry.get("storage_location", ""),
-                manual_location=entry.get("storage_location", ""),
-                component_type=component.get("part_info", {}).get("type", ""),
-            )
-            try:
-                self.backend.add_component(component)
-                summary["added"] += 1
-            except Exception as exc:
-                summary["errors"].append(f"{barcode_data['part_number']}: {exc}")
+    def handle_bulk_lookup_result(self, position, component, error):
+        context = self.bulk_context
+        if context is None:
+            return
+        # Results arrive as lookups finish; components are added in scan order
+        context["results"][position] = (component, error)
+        while context["next_position"] in context["results"]:
+            self._apply_bulk_result(context, context["next_position"])
+            context["next_position"] += 1
+        self.lookup_button.setText(f"Looking Up {len(context['results'])}/{len(context['lookups'])}")
+
+    def _apply_bulk_result(self, context, position):
+        entry, barcode_data = context["lookups"][position]
+        component, error = context["results"][position]
+        summary = context["summary"]
+        if error:
+            summary["errors"].append(f"{barcode_data['part_number']}: {error}")
+        elif not component:
+            summary["unmatched"].append(barcode_data.get("part_number", "Unknown"))
+        else:
+            self._add_bulk_component(entry, barcode_data, component, summary, context["locations"].get(position))
+
+    def handle_bulk_lookup_finished(self, error):
+        context = self.bulk_context
+        self.bulk_context = None
+        self.set_lookup_busy(False)
+        if context is None:
+            return
+        for position in range(context["next_position"], len(context["lookups"])):
+            if position in context["results"]:
+                self._apply_bulk_result(context, position)
+            else:
+                _, barcode_data = context["lookups"][position]
+                context["summary"]["errors"].append(f"{barcode_data['part_number']}: {error or 'The lookup did not complete.'}")
+        self._finish_bulk_barcodes(context["summary"], context["reserved_locations"])
 
+    def _finish_bulk_barcodes(self, summary, reserved_locations):
+        if reserved_locations:
+            self.backend.release_locations(reserved_locations)
         self.refresh()
         self.part_added.emit()
         self._show_bulk_summary(summary)
 
+    def _add_bulk_component(self, entry, barcode_data, component, summary, location=None):
+        component["part_info"]["count"] = int(barcode_data.get("count", 0))
+        component["metadata"]["low_stock"] = entry["low_stock"]
+        component["part_info"]["location"] = self.resolve_storage_location(
+            entry.get("storage_mode"),
+            bin_location=entry.get("storage_location", ""),
+            manual_location=entry.get("storage_location", ""),
+            component_type=component.get("part_info", {}).get("type", ""),
+        )
+        if component["part_info"]["location"] == "N/A" and location:
+            component["part_info"]["location"] = location
+        try:
+            self.backend.add_component(component)
+            summary["added"] += 1
+        except Exception as exc:
+            summary["errors"].append(f"{barcode_data['part_number']}: {exc}")
+
     def _show_bulk_summary(self, summary):
         lines = [
             f"Added: {summary['added']}",
@@ -1478,61 +1686,33 @@ class AddPartPage(QWidget):
         if not new_raw:
             return False
 
-        new_part_number = self.backend.normalize_part_number(new_raw)
-        existing_components = self.backend.get_all_components()
-        part_map = {}
-        normalized_parts = []
-
-        for component in existing_components:
-            manufacturer = component.get("part_info", {}).get("manufacturer_number", "").strip().lower()
-            if manufacturer:
-                normalized = self.backend.normalize_part_number(manufacturer)
-                part_map[normalized] = manufacturer
-                normalized_parts.append(normalized)
-
-        if new_part_number in normalized_parts:
-            actual_match = part_map[new_part_number]
-            for component in existing_components:
-                existing = component.get("part_info", {}).get("manufacturer_number", "").strip().lower()
-                if existing == actual_match:
-                    self._increment_existing_component(component, barcode_data, "barcode exact match")
-                    if interactive:
-                        QMessageBox.information(self, "Duplicate Found", f"Updated existing component {actual_match} from the scanned barcode.")
-                    return "duplicate"
-
-        close_matches = difflib.get_close_matches(new_part_number, normalized_parts, n=1, cutoff=0.8)
-        if close_matches:
-            suggested_norm = close_matches[0]
-            suggested_actual = part_map[suggested_norm]
-            if not interactive:
-                return "possible_duplicate"
-            response = QMessageBox.question(
-                self,
-                "Possible Duplicate",
-                f"Did you mean '{suggested_actual}' instead of '{new_raw}'?",
-            )
-            if response == QMessageBox.StandardButton.Yes:
-                for component in existing_components:
-                    existing = component.get("part_info", {}).get("manufacturer_number", "").strip().lower()
-                    if existing == suggested_actual:
-                        self._increment_existing_component(component, barcode_data, "barcode fuzzy match")
-                        QMessageBox.information(self, "Duplicate Found", f"Updated existing component {suggested_actual} from the scanned barcode.")
-                        return "duplicate"
+        match = self.backend.find_manufacturer_match(new_raw)
+        if match is None:
+            return False
+        component, actual_match, exact = match
+
+        if exact:
+            self._increment_existing_component(component, barcode_data, "barcode exact match")
+            if interactive:
+                QMessageBox.information(self, "Duplicate Found", f"Updated existing component {actual_match} from the scanned barcode.")
+            return "duplicate"
+
+        if not interactive:
+            return "possible_duplicate"
+        response = QMessageBox.question(
+            self,
+            "Possible Duplicate",
+            f"Did you mean '{actual_match}' instead of '{new_raw}'?",
+        )
+        if response == QMessageBox.StandardButton.Yes:
+            self._increment_existing_component(component, barcode_data, "barcode fuzzy match")
+            QMessageBox.information(self, "Duplicate Found", f"Updated existing component {actual_match} from the scanned barcode.")
+            return "duplicate"
 
         return False
 
     def _increment_existing_component(self, component, barcode_data, reason):
-        try:
-            existing_count = int(component.get("part_info", {}).get("count", 0))
-        except ValueError:
-            existing_count = 0
-        new_count = existing_count + int(barcode_data.get("count", 0))
-        component["part_info"]["count"] = new_count
-        self.backend.log_change(
-            f"Updated component '{component.get('part_info', {}).get('manufacturer_number', 'Unknown')}' "
-            f"count from {existing_count} to {new_count} ({reason})."
-        )
-        self.backend.save_components()
+        self.backend.add_to_count(component, int(barcode_data.get("count", 0)), reason)
 
     def _populate_manual_barcode_data(self, barcode_data, low_stock, storage_mode=None, storage_location=None):
         self.part_number_input.setText(str(barcode_data.get("part_number", "")))
@@ -1583,6 +1763,9 @@ class AddPartPage(QWidget):
     def refresh(self):
         self.recent_table.set_components(self.backend.get_all_components()[:25])
 
+    def apply_catalogue_changes(self, events):
+        self.refresh()
+
     def delete_selected_component(self):
         component = self.recent_table.selected_component()
         if component is None:
@@ -1608,6 +1791,33 @@ class AddPartPage(QWidget):
         self.component_deleted.emit()
 
 
+class InventorySearchWorker(QObject):
+    finished = pyqtSignal(int, object)
+
+    def __init__(self, search_session):
+        super().__init__()
+        self.search_session = search_session
+        # Set from the UI thread; a search for any other generation is stale.
+        self.latest_generation = 0
+
+    @pyqtSlot(int, str)
+    def search(self, generation, query):
+        def cancelled():
+            return generation != self.latest_generation
+
+        if cancelled():
+            return
+        try:
+            components = self.search_session.search(query, cancelled=cancelled)
+        except SearchCancelled:
+            return
+        except Exception:
+            # An exception escaping a slot on this thread would abort the app
+            logger.exception("Inventory search for %r failed", query)
+            components = []
+        self.finished.emit(generation, components)
+
+
 class DigikeyLookupWorker(QObject):
     finished = pyqtSignal(object, str)
 
@@ -1625,6 +1835,25 @@ class DigikeyLookupWorker(QObject):
             self.finished.emit(None, str(exc))
 
 
+class DigikeyBulkLookupWorker(QObject):
+    result = pyqtSignal(int, object, str)
+    finished = pyqtSignal(str)
+
+    def __init__(self, digikey_api, part_numbers):
+        super().__init__()
+        self.digikey_api = digikey_api
+        self.part_numbers = part_numbers
+
+    def run(self):
+        try:
+            for position, component, error in self.digikey_api.fetch_part_details_bulk(self.part_numbers):
+                self.result.emit(position, component, error)
+        except Exception as exc:
+            self.finished.emit(str(exc))
+        else:
+            self.finished.emit("")
+
+
 class MetricCard(QFrame):
     def __init__(self, label, value):
         super().__init__()
@@ -1900,14 +2129,24 @@ class SettingsDialog(QDialog):
             (
                 ("DIGIKEY_CLIENT_ID", "DigiKey Client ID"),
                 ("DIGIKEY_CLIENT_SECRET", "DigiKey Client Secret"),
+                ("PRODUCT_CACHE_TTL_HOURS", "Part Lookup Cache Hours (default 24)"),
             ),
         ),
         (
             "SERIAL",
             (
-                ("PORT", "Serial Port"),
+                ("PORT", "Serial Port(s), e.g. COM3 or COM3:104, COM4"),
                 ("BAUDRATE", "Baud Rate"),
                 ("TIMEOUT", "Timeout"),
+                ("PROTOCOL", "LED Protocol (auto or legacy)"),
+            ),
+        ),
+        (
+            "LAYOUT",
+            (
+                ("ROWS", "LED Grid Rows"),
+                ("COLUMNS", "LED Grid Columns (up to 26)"),
+                ("WIRING", "LED Wiring (serpentine or row_major)"),
             ),
         ),
         (
@@ -1916,6 +2155,7 @@ class SettingsDialog(QDialog):
                 ("COMPONENT_CATALOGUE", "Component Catalogue"),
                 ("CHANGELOG", "Changelog"),
                 ("IMAGE_CACHE", "Image Cache"),
+                ("STORAGE_ENGINE", "Storage Engine (json or sqlite)"),
             ),
         ),
     )
@@ -2007,6 +2247,12 @@ class SettingsDialog(QDialog):
 
         if not self._validate_numeric(config):
             return
+        if not self._validate_storage_engine(config):
+            return
+        if not self._validate_serial_protocol(config):
+            return
+        if not self._validate_layout(config):
+            return
 
         self.initializer.save_config(config)
         self.initializer.ensure_runtime_files()
@@ -2024,19 +2270,64 @@ class SettingsDialog(QDialog):
         if timeout and not timeout.isdigit():
             QMessageBox.warning(self, "Invalid Timeout", "Timeout must be blank or an integer.")
             return False
+        cache_hours = str(config.get("API", {}).get("PRODUCT_CACHE_TTL_HOURS", "")).strip()
+        if cache_hours and not cache_hours.isdigit():
+            QMessageBox.warning(self, "Invalid Cache Hours", "Part Lookup Cache Hours must be blank or an integer.")
+            return False
+        return True
+
+    def _validate_storage_engine(self, config):
+        engine = str(config.get("FILES", {}).get("STORAGE_ENGINE", "")).strip().lower()
+        if engine and engine not in STORAGE_ENGINES:
+            QMessageBox.warning(self, "Invalid Storage Engine", "Storage Engine must be blank, json, or sqlite.")
+            return False
+        config["FILES"]["STORAGE_ENGINE"] = engine
+        return True
+
+    def _validate_serial_protocol(self, config):
+        protocol = str(config.get("SERIAL", {}).get("PROTOCOL", "")).strip().lower()
+        if protocol and protocol not in SERIAL_PROTOCOLS:
+            QMessageBox.warning(self, "Invalid LED Protocol", "LED Protocol must be blank, auto, or legacy.")
+            return False
+        config["SERIAL"]["PROTOCOL"] = protocol
+        return True
+
+    def _validate_layout(self, config):
+        layout_config = config.get("LAYOUT", {})
+        layout_config["WIRING"] = str(layout_config.get("WIRING", "")).strip().lower()
+        for key, label in (("ROWS", "LED Grid Rows"), ("COLUMNS", "LED Grid Columns")):
+            value = str(layout_config.get(key, "")).strip()
+            if value and not value.isdigit():
+                QMessageBox.warning(self, "Invalid LED Layout", f"{label} must be blank or an integer.")
+                return False
+        if layout_config["WIRING"] and layout_config["WIRING"] not in WIRING_ORDERS:
+            QMessageBox.warning(self, "Invalid LED Layout", "LED Wiring must be blank, serpentine, or row_major.")
+            return False
+        try:
+            LedLayout.parse_config(config)
+        except ValueError as exc:
+            QMessageBox.warning(self, "Invalid LED Layout", str(exc))
+            return False
         return True
 
     def _apply_runtime_settings(self, config):
         files_config = config.get("FILES", {})
         self.backend.data_file = self.initializer.resolve_file_path(files_config.get("COMPONENT_CATALOGUE", ""), "COMPONENT_CATALOGUE")
         self.backend.changelog_file = self.initializer.resolve_file_path(files_config.get("CHANGELOG", ""), "CHANGELOG")
+        self.backend.storage_engine = files_config.get("STORAGE_ENGINE", "")
+        led_layout = LedLayout.from_config(config)
+        self.backend.set_led_layout(led_layout)
         self.backend.load_components()
 
         if self.digikey_api is not None:
             self.digikey_api.load_config()
             self.digikey_api.image_cache = ImageCache()
+            self.digikey_api.product_cache.close()
+            self.digikey_api.product_cache = ProductCache()
 
         led_controller = getattr(self.backend, "ledControl", None)
+        if led_controller is not None and hasattr(led_controller, "set_layout"):
+            led_controller.set_layout(led_layout)
         if led_controller is not None and hasattr(led_controller, "load_config"):
             led_controller.load_config()
         if led_controller is not None and hasattr(led_controller, "reconnect"):
@@ -2743,6 +3034,7 @@ class BomCheckinPreviewDialog(QDialog):
         super().reject()
 
     def _guide_component_returns(self):
+        returns = []
         for row in self.bom_list:
             if not row.get("found"):
                 continue
@@ -2750,10 +3042,20 @@ class BomCheckinPreviewDialog(QDialog):
             location = str(row.get("location") or "").strip()
             if not location or location.upper() == "N/A":
                 continue
-
-            part_number = str(row.get("digikey") or "this part").strip()
+            returns.append((location, str(row.get("digikey") or "this part").strip()))
+
+        # The LEDs walk the same route as the dialogs: the current vial
+        # blinks and the next one glows, advancing as each return is confirmed.
+        route = None
+        animator = getattr(self.led_controller, "animator", None)
+        if animator is not None and self._leds_connected():
+            route_locations = [location for location, _ in returns if self._supports_led_location(location)]
+            if route_locations:
+                route = animator.pick_sequence(route_locations)
+
+        for location, part_number in returns:
             led_enabled = self._leds_connected() and self._supports_led_location(location)
-            if led_enabled and self.led_controller is not None and hasattr(self.led_controller, "highlight_location"):
+            if route is None and led_enabled and self.led_controller is not None and hasattr(self.led_controller, "highlight_location"):
                 self.led_controller.highlight_location(location)
 
             message = f"Return {part_number} to location {location}, then press OK."
@@ -2764,8 +3066,14 @@ class BomCheckinPreviewDialog(QDialog):
                 self,
             )
             dialog.exec()
-            self._turn_off_location_led(location)
+            if route is not None:
+                if self._supports_led_location(location):
+                    route.advance()
+            else:
+                self._turn_off_location_led(location)
 
+        if route is not None:
+            route.stop()
         self._turn_off_all_leds()
 
     def _turn_off_location_led(self, location):
@@ -2792,9 +3100,7 @@ class BomCheckinPreviewDialog(QDialog):
         return False
 
     def _supports_led_location(self, location):
-        row_part = "".join(filter(str.isdigit, str(location or "")))
-        col_part = "".join(filter(str.isalpha, str(location or "")))
-        return bool(row_part and len(col_part) == 1)
+        return self.backend.led_layout.is_led_location(location)
 
 
 class BomResultsDialog(QDialog):
@@ -3352,12 +3658,7 @@ class ComponentDetailsDialog(QDialog):
         return bool(location and location.upper() != "N/A")
 
     def _supports_led_location(self):
-        location = self._current_location()
-        if not location or location.upper() == "N/A":
-            return False
-        row_part = "".join(filter(str.isdigit, location))
-        col_part = "".join(filter(str.isalpha, location))
-        return bool(row_part and len(col_part) == 1)
+        return self.backend.led_layout.is_led_location(self._current_location())
 
     def _turn_on_led(self, location):
         if self.led_controller is None or not location or location.upper() == "N/A":
@@ -3404,8 +3705,11 @@ class ComponentDetailsDialog(QDialog):
         super().reject()
 
 
-class ComponentTable(QTableWidget):
-    deleteRequested = pyqtSignal()
+class ComponentTableModel(QAbstractTableModel):
+    """
+    Table model over catalogue component dicts. Rows reference the backend's
+    components directly; cells are formatted only when the view asks for them.
+    """
 
     COLUMNS = (
         "Part Number",
@@ -3416,10 +3720,121 @@ class ComponentTable(QTableWidget):
         "Low Stock",
         "In Use",
     )
+    FIELDS = (
+        ("part_info", "part_number"),
+        ("part_info", "manufacturer_number"),
+        ("part_info", "location"),
+        ("part_info", "count"),
+        ("part_info", "type"),
+        ("metadata", "low_stock"),
+        ("metadata", "in_use"),
+    )
+    COUNT_COLUMN = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._components = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._components)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        component = self._components[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            section, field = self.FIELDS[index.column()]
+            return str(component.get(section, {}).get(field, "N/A"))
+        if role == Qt.ItemDataRole.UserRole:
+            return component
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == self.COUNT_COLUMN:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def set_components(self, components):
+        components = list(components)
+        if len(components) == len(self._components) and all(
+            new is old for new, old in zip(components, self._components)
+        ):
+            # Same rows in the same order: repaint values instead of resetting,
+            # which keeps the selection and scroll position.
+            if components:
+                self.dataChanged.emit(self.index(0, 0), self.index(len(components) - 1, len(self.COLUMNS) - 1))
+            return
+        self.beginResetModel()
+        self._components = components
+        self._rows = {id(component): row for row, component in enumerate(components)}
+        self.endResetModel()
+
+    def component_for_row(self, row):
+        if 0 <= row < len(self._components):
+            return self._components[row]
+        return None
+
+    def row_for_component(self, component):
+        return self._rows.get(id(component), -1)
+
+    def component_changed(self, component):
+        row = self.row_for_component(component)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+        return row >= 0
+
+    def insert_component(self, row, component):
+        row = max(0, min(row, len(self._components)))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._components.insert(row, component)
+        self._reindex_rows(row)
+        self.endInsertRows()
+
+    def remove_component(self, component):
+        row = self.row_for_component(component)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._components[row]
+        del self._rows[id(component)]
+        self._reindex_rows(row)
+        self.endRemoveRows()
+        return True
+
+    def replace_component(self, previous, component):
+        row = self.row_for_component(previous)
+        if row < 0:
+            return False
+        self._components[row] = component
+        del self._rows[id(previous)]
+        self._rows[id(component)] = row
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+        return True
+
+    def _reindex_rows(self, start):
+        for row in range(start, len(self._components)):
+            self._rows[id(self._components[row])] = row
+
+
+class ComponentTable(QTableView):
+    deleteRequested = pyqtSignal()
+    componentDoubleClicked = pyqtSignal(object)
+
+    COLUMNS = ComponentTableModel.COLUMNS
 
     def __init__(self):
-        super().__init__(0, len(self.COLUMNS))
-        self.setHorizontalHeaderLabels(self.COLUMNS)
+        super().__init__()
+        self.component_model = ComponentTableModel(self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.component_model)
+        self.setModel(self.proxy_model)
+        self.doubleClicked.connect(self._emit_component_double_clicked)
         self.setAlternatingRowColors(True)
         self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
@@ -3443,45 +3858,32 @@ class ComponentTable(QTableWidget):
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
+        self.setSortingEnabled(True)
 
     def set_components(self, components):
-        self.setSortingEnabled(False)
-        self.setRowCount(len(components))
+        self.component_model.set_components(components)
 
-        for row, component in enumerate(components):
-            part_info = component.get("part_info", {})
-            metadata = component.get("metadata", {})
-            values = (
-                part_info.get("part_number", "N/A"),
-                part_info.get("manufacturer_number", "N/A"),
-                part_info.get("location", "N/A"),
-                part_info.get("count", "N/A"),
-                part_info.get("type", "N/A"),
-                metadata.get("low_stock", "N/A"),
-                metadata.get("in_use", "N/A"),
-            )
-            for column, value in enumerate(values):
-                item = QTableWidgetItem(str(value))
-                if column == 0:
-                    item.setData(Qt.ItemDataRole.UserRole, component)
-                if column == 3:
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.setItem(row, column, item)
-
-        self.setSortingEnabled(True)
+    def component_changed(self, component):
+        """Repaints the row showing `component`; returns False if it is not listed."""
+        return self.component_model.component_changed(component)
 
     def component_for_row(self, row):
-        item = self.item(row, 0)
-        if item is None:
+        source_index = self.proxy_model.mapToSource(self.proxy_model.index(row, 0))
+        if not source_index.isValid():
             return None
-        return item.data(Qt.ItemDataRole.UserRole)
+        return self.component_model.component_for_row(source_index.row())
 
     def selected_component(self):
-        row = self.currentRow()
+        row = self.currentIndex().row()
         if row < 0:
             return None
         return self.component_for_row(row)
 
+    def _emit_component_double_clicked(self, index):
+        component = self.component_for_row(index.row())
+        if component is not None:
+            self.componentDoubleClicked.emit(component)
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Delete:
             self.deleteRequested.emit()
@@ -5,6 +5,23 @@ import json
 from dataclasses import dataclass
 from file_initializer import FileInitializer
 
+def resolve_image_cache_path():
+    """Path of image_cache.db from config.json (FILES.IMAGE_CACHE), or the default."""
+    script_dir = os.path.dirname(__file__)
+    config_path = os.path.join(script_dir, "Databases", "config.json")
+    configured_path = ""
+    try:
+        with open(config_path, "r") as file:
+            config = json.load(file)
+            configured_path = config.get("FILES", {}).get("IMAGE_CACHE", "")
+    except (FileNotFoundError, json.JSONDecodeError):
+        configured_path = ""
+
+    relative_path = configured_path or FileInitializer.DEFAULT_PATHS["IMAGE_CACHE"]
+    if os.path.isabs(relative_path):
+        return relative_path
+    return os.path.join(script_dir, relative_path)
+
 @dataclass
 class ImageCacheEntry:
     dk_part_number: str | None
@@ -39,20 +56,7 @@ class ImageCache:
             pass # avoid crash
 
     def _resolve_db_path(self):
-        script_dir = os.path.dirname(__file__)
-        config_path = os.path.join(script_dir, "Databases", "config.json")
-        configured_path = ""
-        try:
-            with open(config_path, "r") as file:
-                config = json.load(file)
-                configured_path = config.get("FILES", {}).get("IMAGE_CACHE", "")
-        except (FileNotFoundError, json.JSONDecodeError):
-            configured_path = ""
-
-        relative_path = configured_path or FileInitializer.DEFAULT_PATHS["IMAGE_CACHE"]
-        if os.path.isabs(relative_path):
-            return relative_path
-        return os.path.join(script_dir, relative_path)
+        return resolve_image_cache_path()
 
     def already_exists(self, part_number: str | None):
         cursor = self.conn.cursor()
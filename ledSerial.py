@@ -2,71 +2,377 @@ import serial
 import threading
 import time
 import json
+import math
 import os
 import logging
+from collections import deque
+from concurrent.futures import Future
 from threading import Lock
+from file_initializer import SERIAL_PROTOCOLS
+from led_layout import LedLayout
 
 logger = logging.getLogger(__name__)
-
+
+# Batched pixel frames, used when the firmware answers the CAPS probe with
+# BATCH (or BATCH=<max pixels per frame>). Layout:
+#   0xA5 0x5A | opcode | payload length (u16 BE) | payload | CRC-8 (poly 0x07)
+# The CRC covers opcode, length and payload. A SET payload is one 5-byte
+# record per pixel: index (u16 BE), red, green, blue.
+FRAME_SYNC = b"\xA5\x5A"
+FRAME_OP_SET = 0x01
+DEFAULT_BATCH_PIXELS = 32
+CAPS_PROBE_TIMEOUT = 0.3
+
+# Optional text commands advertised in the CAPS reply:
+#   CLEAR                          every LED off
+#   FILL <start> <count> <r> <g> <b>   a run of LEDs set to one color
+#   SETN <r> <g> <b> <i> [<i> ...]     several LEDs set to one color
+MIN_FILL_RUN = 3
+SERIAL_LINE_MAX = 64    # Arduino serial buffer; a text command, newline included, must fit
+OFF = (0, 0, 0)
+
+RECONNECT_INITIAL_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+# LedAnimator: frames per second, and how the pulse and pick-route effects are drawn
+ANIMATION_TICK_HZ = 20
+PULSE_LEVELS = 8
+PULSE_FLOOR = 0.1
+PREVIEW_BRIGHTNESS = 0.2
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "Databases", "config.json")
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(opcode, payload):
+    body = bytes((opcode,)) + len(payload).to_bytes(2, "big") + payload
+    return FRAME_SYNC + body + bytes((crc8(body),))
+
+
+def encode_set_frame(pixels):
+    """Encodes [(index, (r, g, b)), ...] as one SET frame."""
+    payload = bytearray()
+    for index, (red, green, blue) in pixels:
+        payload += index.to_bytes(2, "big")
+        payload += bytes((red, green, blue))
+    return encode_frame(FRAME_OP_SET, bytes(payload))
+
+
+def parse_ports(text):
+    """
+    Split the SERIAL.PORT setting into [(port, led_count or None), ...]. A
+    storage wall with several controllers lists them comma-separated, each
+    optionally followed by ":<number of LEDs>", e.g. "COM3:104, COM4".
+    """
+    ports = []
+    for entry in str(text or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        port, separator, count = entry.rpartition(":")
+        if separator and port.strip() and count.strip().isdigit():
+            ports.append((port.strip(), int(count)))
+        else:
+            ports.append((entry, None))
+    return ports
+
+
+def plan_segments(ports, total_leds):
+    """
+    Give each port its consecutive slice of the layout's LED indexes as
+    (port, index_offset, num_leds). Ports without a count share whatever
+    the counted ones leave over; ValueError if that leaves a port no LEDs.
+    """
+    fixed = sum(count for _, count in ports if count)
+    open_ports = [position for position, (_, count) in enumerate(ports) if not count]
+    remaining = max(total_leds - fixed, 0)
+    if open_ports and remaining < len(open_ports):
+        names = ", ".join(ports[position][0] for position in open_ports)
+        raise ValueError(f"No LEDs left for {names}: the listed LED counts leave {remaining} of {total_leds} LEDs for them.")
+    share = remaining // len(open_ports) if open_ports else 0
+    segments = []
+    offset = 0
+    for position, (port, count) in enumerate(ports):
+        if not count:
+            count = share + (remaining - share * len(open_ports) if position == open_ports[-1] else 0)
+        segments.append((port, offset, count))
+        offset += count
+    return segments
+
+
 class LedController:
-    def __init__(self, show_errors=True, error_reporter=None):
+    def __init__(self, show_errors=True, error_reporter=None, connect=True, port=None, baudrate=None, timeout=None,
+                 protocol=None, layout=None, index_offset=0, num_leds=None):
         self.show_errors = show_errors
         self.error_reporter = error_reporter
-        self.num_leds = 104
+        self.layout = layout or LedLayout()
+        # An injected layout is shared with Backend; load_config() must not replace it
+        self._shared_layout = layout is not None
+        self.num_leds = self.layout.size
+        # First global LED index (in the layout) driven by this controller
+        self.index_offset = index_offset
         self.recent_leds = set()
-        self._req_id = 0
+        # Last color written to each LED index; a missing entry means the
+        # hardware state is unknown, so the next update for it is always sent.
+        self.framebuffer = {}
+        # Color each LED should show, kept while disconnected so a reconnect
+        # can put the strip back the way it was.
+        self.target = {}
         self.ser = None
         self.port = None
         self.baudrate = 9600
         self.timeout = 1
+        self.protocol = "auto"
         self.last_error = ""
-
-        # Protect set mutations across threads
-        self._req_lock = threading.Lock()   # for highlight request gating
+        self.capabilities = {}
+        self.connecting = False
+        self.status_listeners = []
+        self.reconnects = 0
+        self.reconnect_failures = 0
+        self.reconnect_latencies = deque(maxlen=20)
+        self.next_reconnect_delay = None
+
+        # Protect set mutations across threads
         self._lock = Lock()
-
-        self.load_config()
-        self.connect_serial()
+        self._write_lock = Lock()   # keeps frames from interleaving on the wire
+        self._connect_lock = Lock()
+
+        # Pixel updates waiting for the writer thread, coalesced by LED index
+        self._queue_cond = threading.Condition()
+        self._pending = {}
+        self._pending_futures = []
+        self._pending_delay = 0.0
+        self._settle_until = 0.0
+        self._closing = False
+        self._writer = threading.Thread(target=self._writer_loop, name="LedWriter", daemon=True)
+        self._writer.start()
+
+        # Reconnects after serial errors or a failed connect, with backoff
+        self._reconnect_wanted = threading.Event()
+        self._stopped = threading.Event()
+        self._supervisor = threading.Thread(target=self._supervise, name="LedSupervisor", daemon=True)
+        self._supervisor.start()
+
+        self.animator = LedAnimator(self)
+
+        # An explicit port (the simulator and benchmark pass one) bypasses config.json
+        if port is None:
+            self.load_config()
+        else:
+            self.port = port
+        if baudrate is not None:
+            self.baudrate = baudrate
+        if timeout is not None:
+            self.timeout = timeout
+        if protocol is not None:
+            self.protocol = protocol
+        if num_leds is not None:
+            self.num_leds = num_leds
+        if connect:
+            self.connect_serial()
 
     def load_config(self):
-        """Load serial config from config.json"""
-        config_path = os.path.join(os.path.dirname(__file__), "Databases", "config.json")
+        """Load serial config from config.json (the first port when several are listed)"""
         try:
-            with open(config_path, "r") as file:
+            with open(CONFIG_PATH, "r") as file:
                 config = json.load(file)
                 serial_config = config.get("SERIAL", {})
-                self.port = serial_config.get("PORT", "")
                 baudrate = serial_config.get("BAUDRATE", "")
                 timeout = serial_config.get("TIMEOUT", "")
+                protocol = str(serial_config.get("PROTOCOL", "")).strip().lower()
                 self.baudrate = int(baudrate) if str(baudrate).strip() else 9600
                 self.timeout = int(timeout) if str(timeout).strip() else 1
+                self.protocol = protocol if protocol in SERIAL_PROTOCOLS else "auto"
+                if not self._shared_layout:
+                    self.layout = LedLayout.from_config(config)
+                segments = plan_segments(parse_ports(serial_config.get("PORT", "")), self.layout.size)
+                self.port, self.index_offset, self.num_leds = segments[0] if segments else ("", 0, self.layout.size)
         except Exception as e:
             logger.exception("Error loading config file: %s", e)
-            self._show_error("Config Error", "Failed to load serial settings from config.json")
+            self._show_error("Config Error", f"Failed to load serial settings from config.json:\n{e}")
             self.port = ""
             self.baudrate = 9600
             self.timeout = 1
+            self.protocol = "auto"
 
-    def connect_serial(self):
-        """Establish serial connection with LED controller"""
+    def connect_serial(self, replay=False):
+        """
+        Establish serial connection with LED controller. The strip is cleared,
+        or with `replay` set back to the colors it had before the connection
+        was lost.
+        """
+        with self._connect_lock:
+            self._open_serial(replay)
+        self._notify_status()
+
+    def _open_serial(self, replay):
         try:
-            if self.ser is not None:
-                try:
-                    self.ser.close()
-                except Exception:
-                    pass
-                self.ser = None
-            if not self.port:
-                raise ValueError("Serial port not defined in config.json")
-            self.ser = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=self.timeout)
-            time.sleep(0.5)  # Let Arduino initialize
-            self.turn_off_all()
+            with self._write_lock:
+                # close() may have run while a reconnect was on its way here;
+                # the port must stay closed (and free for a replacement controller)
+                if self._stopped.is_set():
+                    return
+                if self.ser is not None:
+                    try:
+                        self.ser.close()
+                    except Exception:
+                        pass
+                    self.ser = None
+                if not self.port:
+                    raise ValueError("Serial port not defined in config.json")
+                self.ser = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=self.timeout)
+                self.framebuffer = {}
+                time.sleep(0.5)  # Let Arduino initialize
+                self._probe_capabilities()
+            if replay:
+                self._enqueue(self._target_pixels(), line_delay=0.05)
+            else:
+                self.turn_off_all()
             self.last_error = ""
         except Exception as e:
             logger.warning("Error opening serial port: %s", e)
             self.last_error = str(e)
             self._show_error("LED System Error", "LED Controller Failed To Load")
             self.ser = None
+            if self.port and not replay:
+                self._reconnect_wanted.set()
+        finally:
+            self.connecting = False
+
+    def _target_pixels(self):
+        """Every LED's wanted color, for rewriting a strip whose state is unknown."""
+        pixels = {index: OFF for index in range(self.num_leds)}
+        pixels.update(self.target)
+        return list(pixels.items())
+
+    def _supervise(self):
+        """
+        Wait for the connection to drop, then retry with exponential backoff
+        until it is back (or a manual reconnect beats us to it).
+        """
+        while not self._stopped.is_set():
+            self._reconnect_wanted.wait()
+            if self._stopped.is_set():
+                return
+            lost_at = time.monotonic()
+            delay = RECONNECT_INITIAL_DELAY
+            while not self.is_connected() and self.port:
+                self.next_reconnect_delay = delay
+                self._notify_status()
+                if self._stopped.wait(delay):
+                    return
+                if self.is_connected():
+                    break
+                logger.info("Reconnecting to LED controller on %s...", self.port)
+                self.connect_serial(replay=True)
+                if self.is_connected():
+                    self.reconnects += 1
+                    self.reconnect_latencies.append(time.monotonic() - lost_at)
+                    logger.info("LED controller reconnected after %.1f s", self.reconnect_latencies[-1])
+                else:
+                    self.reconnect_failures += 1
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            self.next_reconnect_delay = None
+            self._reconnect_wanted.clear()
+            self._notify_status()
+
+    def connect_in_background(self):
+        """
+        Run connect_serial on a worker thread so the Arduino reset delay and
+        the initial clear do not hold up the caller. Status listeners hear
+        about the "Connecting" state now and the outcome when it finishes.
+        Returns a Future that resolves to whether the controller connected.
+        """
+        future = Future()
+        self.connecting = True
+        self._notify_status()
+
+        def run():
+            try:
+                self.connect_serial()
+            finally:
+                future.set_result(self.is_connected())
+
+        threading.Thread(target=run, name="LedConnect", daemon=True).start()
+        return future
+
+    def add_status_listener(self, callback):
+        """`callback(status)` is called, possibly from a worker thread, whenever the connection state changes."""
+        if callback not in self.status_listeners:
+            self.status_listeners.append(callback)
+
+    def remove_status_listener(self, callback):
+        if callback in self.status_listeners:
+            self.status_listeners.remove(callback)
+
+    def _notify_status(self):
+        status = self.get_status()
+        for callback in list(self.status_listeners):
+            try:
+                callback(status)
+            except Exception:
+                logger.exception("LED status listener failed")
+
+    def _probe_capabilities(self):
+        """
+        Ask the firmware which optional commands it understands. Firmware that
+        predates the probe ignores it (or answers with something else), which
+        leaves us on the line protocol. With PROTOCOL set to "legacy" the probe
+        is skipped, for firmware that misbehaves on commands it does not know.
+        """
+        self.capabilities = {}
+        if self.protocol == "legacy":
+            logger.info("LED controller protocol set to legacy; skipping the CAPS probe.")
+            return
+        try:
+            self.ser.reset_input_buffer()
+            self.ser.timeout = CAPS_PROBE_TIMEOUT
+            self.ser.write(b"CAPS\n")
+            self.ser.flush()
+            reply = self.ser.readline().decode("ascii", errors="ignore").split()
+        except Exception as e:
+            logger.warning("LED capability probe failed: %s", e)
+            return
+        finally:
+            try:
+                self.ser.timeout = self.timeout
+            except Exception:
+                pass
+        if not reply or reply[0].upper() != "CAPS":
+            logger.info("LED controller did not answer CAPS; using the line protocol.")
+            return
+        for token in reply[1:]:
+            name, _, value = token.partition("=")
+            self.capabilities[name.upper()] = value
+        logger.info("LED controller capabilities: %s", ", ".join(sorted(self.capabilities)) or "none")
+
+    def _batch_size(self):
+        """Pixels per SET frame, or 0 when the firmware only takes SET lines."""
+        if "BATCH" not in self.capabilities:
+            return 0
+        try:
+            return max(1, min(int(self.capabilities["BATCH"]), 0xFFFF // 5))
+        except ValueError:
+            return DEFAULT_BATCH_PIXELS
 
     def _show_error(self, title, message):
         if self.show_errors and self.error_reporter:
@@ -80,14 +386,18 @@ class LedController:
         except Exception:
             pass
         self.ser = None
-        with self._lock:
-            self.recent_leds.clear()
+        self.capabilities = {}
+        self.framebuffer = {}
+        if self.port:
+            self._reconnect_wanted.set()
+        self._notify_status()
 
     def _write_command(self, command):
         if self.ser is None:
             return False
         try:
-            self.ser.write(command)
+            with self._write_lock:
+                self.ser.write(command)
             return True
         except Exception as error:
             logger.warning("LED controller write failed: %s", error)
@@ -105,15 +415,204 @@ class LedController:
             self._handle_serial_error(error)
             return False
 
+    def _send_pixels(self, pixels, line_delay=0.005):
+        """
+        Send [(index, (r, g, b)), ...] as batch frames when the firmware
+        supports them, otherwise as SET lines spaced `line_delay` seconds apart.
+        Returns True if everything was written and flushed.
+        """
+        if self.ser is None:
+            return False
+        batch_size = self._batch_size()
+        if batch_size:
+            for start in range(0, len(pixels), batch_size):
+                if not self._write_command(encode_set_frame(pixels[start:start + batch_size])):
+                    return False
+        else:
+            for index, (red, green, blue) in pixels:
+                if not self._write_command(f"SET {index} {red} {green} {blue}\n".encode('utf-8')):
+                    return False
+                time.sleep(line_delay)
+        return self._flush_serial()
+
+    def _send_update(self, pixels, line_delay=0.005):
+        """
+        Write a diffed update with the cheapest commands the firmware offers:
+        CLEAR when every LED outside the update is already off (the lit ones
+        are then set again afterwards), FILL for runs of one
+        color, SETN for scattered LEDs sharing a color, and per-pixel sets
+        (frames or SET lines) for whatever is left.
+        """
+        if self.ser is None:
+            return False
+        caps = self.capabilities
+        if "CLEAR" in caps and self._clears_strip(pixels):
+            if not self._write_line("CLEAR", line_delay):
+                return False
+            pixels = [(index, color) for index, color in pixels if color != OFF or index >= self.num_leds]
+
+        if "FILL" in caps or "SETN" in caps:
+            by_color = {}
+            for index, color in sorted(pixels):
+                by_color.setdefault(color, []).append(index)
+            pixels = []
+            for color, indexes in by_color.items():
+                red, green, blue = color
+                singles = []
+                for start, count in self._runs(indexes):
+                    if "FILL" in caps and count >= MIN_FILL_RUN:
+                        if not self._write_line(f"FILL {start} {count} {red} {green} {blue}", line_delay):
+                            return False
+                    else:
+                        singles.extend(range(start, start + count))
+                if "SETN" in caps and len(singles) > 1:
+                    for line in self._setn_lines(color, singles):
+                        if not self._write_line(line, line_delay):
+                            return False
+                else:
+                    pixels.extend((index, color) for index in singles)
+
+        return self._send_pixels(pixels, line_delay=line_delay)
+
+    def _clears_strip(self, pixels):
+        """True when a CLEAR can stand in for the update's off pixels without darkening anything else."""
+        update = dict(pixels)
+        if sum(1 for color in update.values() if color == OFF) < 2:
+            return False
+        framebuffer = self.framebuffer
+        return all(index in update or framebuffer.get(index) == OFF for index in range(self.num_leds))
+
+    @staticmethod
+    def _setn_lines(color, indexes):
+        """SETN lines for `indexes`, each packed with as many as fit in SERIAL_LINE_MAX bytes."""
+        prefix = "SETN {} {} {}".format(*color)
+        line = prefix
+        for index in indexes:
+            target = f" {index}"
+            # +1 for the newline _write_line appends
+            if line != prefix and len(line) + len(target) + 1 > SERIAL_LINE_MAX:
+                yield line
+                line = prefix
+            line += target
+        if line != prefix:
+            yield line
+
+    @staticmethod
+    def _runs(indexes):
+        """Split sorted indexes into (start, count) runs of consecutive values."""
+        runs = []
+        for index in indexes:
+            if runs and runs[-1][0] + runs[-1][1] == index:
+                runs[-1][1] += 1
+            else:
+                runs.append([index, 1])
+        return [(start, count) for start, count in runs]
+
+    def _write_line(self, command, line_delay):
+        if not self._write_command(f"{command}\n".encode('utf-8')):
+            return False
+        time.sleep(line_delay)
+        return True
+
+    def _enqueue(self, pixels, line_delay=0.005, settle=0.0):
+        """
+        Hand [(index, (r, g, b)), ...] to the writer thread. A newer color for
+        an LED that has not been written yet replaces the older one. `settle`
+        holds the next write back that many seconds so rapid requests collapse
+        into one. Returns a Future that resolves to True once written.
+        """
+        future = Future()
+        with self._queue_cond:
+            self.target.update(pixels)
+            if self.ser is None or self._closing:
+                future.set_result(False)
+                return future
+            for index, color in pixels:
+                self._pending.pop(index, None)
+                self._pending[index] = color
+            self._pending_futures.append(future)
+            self._pending_delay = max(self._pending_delay, line_delay)
+            if settle:
+                self._settle_until = max(self._settle_until, time.monotonic() + settle)
+            self._queue_cond.notify()
+        return future
+
+    @staticmethod
+    def _resolved(value):
+        future = Future()
+        future.set_result(value)
+        return future
+
+    def _writer_loop(self):
+        while True:
+            with self._queue_cond:
+                while not self._pending_futures and not self._closing:
+                    self._queue_cond.wait()
+                if not self._pending_futures:
+                    return
+                remaining = self._settle_until - time.monotonic()
+                while remaining > 0 and not self._closing:
+                    self._queue_cond.wait(remaining)
+                    remaining = self._settle_until - time.monotonic()
+                pixels = list(self._pending.items())
+                futures = self._pending_futures
+                line_delay = self._pending_delay
+                self._pending = {}
+                self._pending_futures = []
+                self._pending_delay = 0.0
+
+            # Only pixels whose color differs from what the strip already shows go out
+            framebuffer = self.framebuffer
+            pixels = [(index, color) for index, color in pixels if framebuffer.get(index) != color]
+            try:
+                written = self._send_update(pixels, line_delay=line_delay) if pixels else self.ser is not None
+            except Exception:
+                logger.exception("LED writer failed")
+                written = False
+            if written:
+                framebuffer.update(pixels)
+            for future in futures:
+                future.set_result(written)
+
+    def close(self):
+        """Write whatever is still queued, stop the worker threads and close the port."""
+        self.animator.close()
+        self._stopped.set()
+        self._reconnect_wanted.set()
+        with self._queue_cond:
+            self._closing = True
+            self._queue_cond.notify()
+        self._writer.join(timeout=5)
+        self._supervisor.join(timeout=5)
+        with self._write_lock:
+            if self.ser is not None:
+                try:
+                    self.ser.close()
+                except Exception:
+                    pass
+                self.ser = None
+
     def is_connected(self):
         return bool(self.ser is not None and getattr(self.ser, "is_open", True))
 
     def get_status(self):
+        if self.connecting:
+            return {
+                "connected": False,
+                "label": "Connecting",
+                "details": f"Connecting to the LED controller on {self.port or 'the configured port'}...",
+            }
+
         if self.is_connected():
+            if self.capabilities:
+                protocol = f"Firmware supports {', '.join(sorted(self.capabilities))}."
+            else:
+                protocol = "Using the SET line protocol."
             return {
                 "connected": True,
                 "label": "Connected",
-                "details": f"LED controller connected on {self.port} at {self.baudrate} baud.",
+                "details": f"LED controller connected on {self.port} at {self.baudrate} baud. {protocol}{self._reconnect_summary()}",
+                **self._reconnect_metrics(),
             }
 
         if self.port:
@@ -123,150 +622,581 @@ class LedController:
 
         if self.last_error:
             detail = f"{detail} Last error: {self.last_error}"
+        if self.next_reconnect_delay is not None:
+            detail = f"{detail} Retrying every {self.next_reconnect_delay:g} s."
 
         return {
             "connected": False,
             "label": "Disconnected",
-            "details": detail,
+            "details": f"{detail}{self._reconnect_summary()}",
+            **self._reconnect_metrics(),
+        }
+
+    def _reconnect_metrics(self):
+        latencies = list(self.reconnect_latencies)
+        return {
+            "reconnects": self.reconnects,
+            "reconnect_failures": self.reconnect_failures,
+            "last_reconnect_seconds": latencies[-1] if latencies else None,
+            "average_reconnect_seconds": sum(latencies) / len(latencies) if latencies else None,
         }
+
+    def _reconnect_summary(self):
+        if not self.reconnects and not self.reconnect_failures:
+            return ""
+        summary = f" Automatic reconnects: {self.reconnects}, failed attempts: {self.reconnect_failures}."
+        if self.reconnect_latencies:
+            summary = f"{summary} Last reconnect took {self.reconnect_latencies[-1]:.1f} s."
+        return summary
 
     def reconnect(self):
         logger.info("Attempting to reconnect to LED controller...")
         self.connect_serial()
 
     def location_to_index(self, location_code):
-        if not location_code:
+        """Index on this controller's strip, or None when the location is not wired to it."""
+        index = self.layout.led_index(location_code)
+        if index is None:
             return None
-        row_part = ''.join(filter(str.isdigit, location_code))
-        col_part = ''.join(filter(str.isalpha, location_code)).upper()
-        try:
-            row = int(row_part)
-        except ValueError:
-            return None
-        if not col_part or len(col_part) != 1:
-            return None
-        if row % 2 == 0:
-            col_index = 25 - (ord(col_part) - ord('A'))
-        else:
-            col_index = ord(col_part) - ord('A')
-        return (row - 1) * 26 + col_index
-    
+        index -= self.index_offset
+        return index if 0 <= index < self.num_leds else None
+
     def _compute_color(self, location_code):
         """Return (r,g,b): odd-letter → green, even-letter → blue."""
-        if not location_code:
-            return (0,0,0)
-        letter = location_code[-1].upper()
-        idx = ord(letter) - ord('A') + 1
-        return (0,255,0) if (idx % 2) else (0,0,255)
-
-    def set_led_on(self, location_code, red, green, blue):
-        index = self.location_to_index(location_code)
-        if index is None or self.ser is None:
-            return
-        cmd = f"SET {index} {red} {green} {blue}\n".encode('utf-8')
-        if not self._write_command(cmd):
-            return
-        if not self._flush_serial():
-            return
-        with self._lock:
-            self.recent_leds.add(index)
+        return self.layout.color(location_code) or OFF
+
+    def set_led_on(self, location_code, red, green, blue):
+        index = self.location_to_index(location_code)
+        if index is None:
+            return self._resolved(False)
+        with self._lock:
+            self.recent_leds.add(index)
+        return self._enqueue([(index, (red, green, blue))])
 
     def turn_off_recent(self):
         """Turns off just the LEDs we've lit since the last clear."""
-        if self.ser is None:
-            return
-
         # snapshot to avoid "set changed size" errors
-        with self._lock:
-            leds = list(self.recent_leds)
-            self.recent_leds.clear()
-
-        for index in leds:
-            cmd = f"SET {index} 0 0 0\n".encode('utf-8')
-            if not self._write_command(cmd):
-                return
-            time.sleep(0.005)
-        self._flush_serial()
+        with self._lock:
+            leds = list(self.recent_leds)
+            self.recent_leds.clear()
+
+        return self._enqueue([(index, (0, 0, 0)) for index in leds], line_delay=0.005)
 
     def turn_off_all(self):
-        """Turns off every LED, with a tiny delay to ensure no commands get dropped."""
-        if self.ser is None:
-            return
-
-        for i in range(self.num_leds):
-            cmd = f"SET {i} 0 0 0\n".encode('utf-8')
-            if not self._write_command(cmd):
-                return
-            time.sleep(0.05)    # staggered write
-        if not self._flush_serial():
-            return
-        with self._lock:
-            self.recent_leds.clear()
+        """
+        Turns off every LED. Only LEDs not already known to be off are written,
+        so after a connect this is a full clear and afterwards it costs one
+        write per lit LED.
+        """
+        with self._lock:
+            self.recent_leds.clear()
+        return self._enqueue([(i, (0, 0, 0)) for i in range(self.num_leds)], line_delay=0.05)
 
-    def turn_off_led(self, location_code):
-        index = self.location_to_index(location_code)
-        if index is None or self.ser is None:
-            return
-        cmd = f"SET {index} 0 0 0\n".encode('utf-8')
-        if not self._write_command(cmd):
-            return
-        if not self._flush_serial():
-            return
-        with self._lock:
-            self.recent_leds.discard(index)
+    def turn_off_led(self, location_code):
+        index = self.location_to_index(location_code)
+        if index is None:
+            return self._resolved(False)
+        with self._lock:
+            self.recent_leds.discard(index)
+        return self._enqueue([(index, (0, 0, 0))])
 
     def turn_off_bom_leds(self, bom_list, led_controller):
         locations = {row.get("location") for row in bom_list if row.get("found") and row.get("location")}
+        future = self._resolved(True)
         for location in locations:
-            time.sleep(0.05)
-            led_controller.turn_off_led(location)
+            # the writer works in order, so the last future covers the rest
+            future = led_controller.turn_off_led(location)
+        return future
 
     def turn_off_all_assigned_leds(self, backend):
         assigned_locations = backend.get_assigned_locations()
-        if self.ser is None:
-            return
-        for loc in assigned_locations:
-            time.sleep(0.05)
-            index = self.location_to_index(loc)
-            if index is not None:
-                if not self._write_command(f"SET {index} 0 0 0\n".encode('utf-8')):
-                    return
-                self.recent_leds.discard(index)
-        self._flush_serial()
+        indexes = {self.location_to_index(loc) for loc in assigned_locations}
+        indexes.discard(None)
+        with self._lock:
+            self.recent_leds.difference_update(indexes)
+        return self._enqueue([(index, (0, 0, 0)) for index in sorted(indexes)], line_delay=0.05)
 
     def highlight_location(self, location_code, delay_ms=50):
         """
-        Immediately turn off previous LEDs, then after delay_ms,
-        light this one—unless a newer request has arrived.
+        Turn off previous LEDs and light this one. The write waits delay_ms
+        so that a newer request arriving meanwhile replaces this one.
         """
-        # bump request counter
-        with self._req_lock:
-            self._req_id += 1
-            my_id = self._req_id
-
-        # synchronous turn‑off
-        self.turn_off_recent()
+        index = self.location_to_index(location_code)
+        with self._lock:
+            leds = self.recent_leds - {index}
+            self.recent_leds.clear()
+            if index is not None:
+                self.recent_leds.add(index)
 
-        def job():
-            time.sleep(delay_ms / 1000.0)
-            # only proceed if still latest request
-            with self._req_lock:
-                if my_id != self._req_id:
-                    return
-            r, g, b = self._compute_color(location_code)
-            self.set_led_on(location_code, r, g, b)
+        pixels = [(led, (0, 0, 0)) for led in leds]
+        if index is not None:
+            pixels.append((index, self._compute_color(location_code)))
+        return self._enqueue(pixels, settle=delay_ms / 1000.0)
 
-        threading.Thread(target=job, daemon=True).start()
+    def apply_frame(self, colors):
+        """
+        Set {location: (r, g, b)} in one queued update; this is how LedAnimator
+        draws. Locations not wired to this controller are ignored.
+        """
+        pixels = {}
+        for location, color in colors.items():
+            index = self.location_to_index(location)
+            if index is not None:
+                pixels[index] = color
+        with self._lock:
+            for index, color in pixels.items():
+                if color == OFF:
+                    self.recent_leds.discard(index)
+                else:
+                    self.recent_leds.add(index)
+        return self._enqueue(list(pixels.items()))
 
     def highlight_all(self, locations, stagger_ms=30):
         """
-        Light all given locations in their odd/even color, staggered
-        so the controller has time to process each.
+        Light all given locations in their odd/even color. On the line
+        protocol commands are spaced stagger_ms apart so the controller has
+        time to process each.
         `locations` can be a list of location codes.
         """
-        for i, loc in enumerate(locations):
-            def job(loc=loc):
-                time.sleep((stagger_ms * i) / 1000.0)
-                r, g, b = self._compute_color(loc)
-                self.set_led_on(loc, r, g, b)
-            threading.Thread(target=job, daemon=True).start()
+        pixels = {}
+        for loc in locations:
+            index = self.location_to_index(loc)
+            if index is not None:
+                pixels[index] = self._compute_color(loc)
+        with self._lock:
+            self.recent_leds.update(pixels)
+        return self._enqueue(list(pixels.items()), line_delay=stagger_ms / 1000.0)
+
+
+def _gather(futures):
+    """One Future for several: True once every one of them resolved to True."""
+    futures = list(futures)
+    combined = Future()
+    if not futures:
+        combined.set_result(True)
+        return combined
+    remaining = [len(futures)]
+    lock = Lock()
+
+    def done(_future):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        combined.set_result(all(future.result() for future in futures))
+
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
+
+
+class LedControllerGroup:
+    """
+    Several LED controllers driving one storage wall. SERIAL.PORT lists the
+    ports in wiring order ("COM3:104, COM4:104"); each controller takes the
+    next run of LED indexes in the layout. Every controller has its own
+    writer thread, so work that spans cabinets is written to all of them at
+    once. With a single port this behaves exactly like LedController.
+    """
+
+    def __init__(self, show_errors=True, error_reporter=None, connect=True, layout=None):
+        self.show_errors = show_errors
+        self.error_reporter = error_reporter
+        # Shared with Backend when injected; otherwise rebuilt from config.json
+        self.layout = layout
+        self._shared_layout = layout is not None
+        self.controllers = []
+        self.status_listeners = []
+        self.animator = LedAnimator(self)
+        self.load_config()
+        if connect:
+            self.reconnect()
+
+    def load_config(self):
+        """Read config.json and rebuild one controller per configured port."""
+        try:
+            with open(CONFIG_PATH, "r") as file:
+                config = json.load(file)
+            serial_config = config.get("SERIAL", {})
+            baudrate = serial_config.get("BAUDRATE", "")
+            timeout = serial_config.get("TIMEOUT", "")
+            protocol = str(serial_config.get("PROTOCOL", "")).strip().lower()
+            layout = self.layout if self._shared_layout else LedLayout.from_config(config)
+            self.layout = layout
+            settings = {
+                "baudrate": int(baudrate) if str(baudrate).strip() else 9600,
+                "timeout": int(timeout) if str(timeout).strip() else 1,
+                "protocol": protocol if protocol in SERIAL_PROTOCOLS else "auto",
+                "layout": layout,
+            }
+            segments = plan_segments(parse_ports(serial_config.get("PORT", "")), layout.size)
+        except Exception as e:
+            logger.exception("Error loading config file: %s", e)
+            if self.show_errors and self.error_reporter:
+                self.error_reporter("Config Error", f"Failed to load serial settings from config.json:\n{e}")
+            settings = {"layout": self.layout} if self._shared_layout else {}
+            segments = []
+        if not segments:
+            segments = [("", 0, None)]
+
+        for controller in self.controllers:
+            controller.remove_status_listener(self._notify_status)
+            controller.close()
+        self.controllers = [
+            LedController(
+                show_errors=self.show_errors,
+                error_reporter=self.error_reporter,
+                connect=False,
+                port=port,
+                index_offset=index_offset,
+                num_leds=num_leds,
+                **settings,
+            )
+            for port, index_offset, num_leds in segments
+        ]
+        for controller in self.controllers:
+            controller.add_status_listener(self._notify_status)
+
+    def set_layout(self, layout):
+        """Share `layout` (the instance Backend uses); applied by the next load_config()."""
+        self.layout = layout
+        self._shared_layout = True
+
+    def _each(self, action):
+        """Run action(controller) on all controllers at the same time and wait for them."""
+        if len(self.controllers) == 1:
+            action(self.controllers[0])
+            return
+        threads = [threading.Thread(target=action, args=(controller,), daemon=True) for controller in self.controllers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def reconnect(self):
+        self._each(lambda controller: controller.reconnect())
+
+    def connect_in_background(self):
+        return _gather(controller.connect_in_background() for controller in self.controllers)
+
+    def close(self):
+        self.animator.close()
+        self._each(lambda controller: controller.close())
+
+    def add_status_listener(self, callback):
+        if callback not in self.status_listeners:
+            self.status_listeners.append(callback)
+
+    def remove_status_listener(self, callback):
+        if callback in self.status_listeners:
+            self.status_listeners.remove(callback)
+
+    def _notify_status(self, _status=None):
+        status = self.get_status()
+        for callback in list(self.status_listeners):
+            try:
+                callback(status)
+            except Exception:
+                logger.exception("LED status listener failed")
+
+    def is_connected(self):
+        # One unplugged cabinet should not turn off guidance for the rest of the wall
+        return any(controller.is_connected() for controller in self.controllers)
+
+    def get_status(self):
+        statuses = [controller.get_status() for controller in self.controllers]
+        if len(statuses) == 1:
+            return statuses[0]
+
+        if all(status["connected"] for status in statuses):
+            label = "Connected"
+        elif any(status["label"] == "Connecting" for status in statuses):
+            label = "Connecting"
+        else:
+            label = "Disconnected"
+        details = " ".join(
+            f"[LEDs {controller.index_offset + 1}-{controller.index_offset + controller.num_leds}] {status['details']}"
+            for controller, status in zip(self.controllers, statuses)
+        )
+        latencies = [latency for controller in self.controllers for latency in controller.reconnect_latencies]
+        lasts = [status["last_reconnect_seconds"] for status in statuses if status.get("last_reconnect_seconds") is not None]
+        return {
+            "connected": label == "Connected",
+            "label": label,
+            "details": details,
+            "reconnects": sum(status.get("reconnects", 0) for status in statuses),
+            "reconnect_failures": sum(status.get("reconnect_failures", 0) for status in statuses),
+            "last_reconnect_seconds": max(lasts) if lasts else None,
+            "average_reconnect_seconds": sum(latencies) / len(latencies) if latencies else None,
+        }
+
+    def _controller_for(self, location_code):
+        for controller in self.controllers:
+            if controller.location_to_index(location_code) is not None:
+                return controller
+        return None
+
+    def location_to_index(self, location_code):
+        """Index in the whole wall's layout, or None when no controller drives the location."""
+        controller = self._controller_for(location_code)
+        if controller is None:
+            return None
+        return controller.index_offset + controller.location_to_index(location_code)
+
+    def _compute_color(self, location_code):
+        return self.controllers[0]._compute_color(location_code)
+
+    def set_led_on(self, location_code, red, green, blue):
+        controller = self._controller_for(location_code)
+        if controller is None:
+            return LedController._resolved(False)
+        return controller.set_led_on(location_code, red, green, blue)
+
+    def turn_off_led(self, location_code):
+        controller = self._controller_for(location_code)
+        if controller is None:
+            return LedController._resolved(False)
+        return controller.turn_off_led(location_code)
+
+    def turn_off_recent(self):
+        return _gather(controller.turn_off_recent() for controller in self.controllers)
+
+    def turn_off_all(self):
+        return _gather(controller.turn_off_all() for controller in self.controllers)
+
+    def turn_off_bom_leds(self, bom_list, led_controller):
+        locations = {row.get("location") for row in bom_list if row.get("found") and row.get("location")}
+        return _gather(led_controller.turn_off_led(location) for location in locations)
+
+    def turn_off_all_assigned_leds(self, backend):
+        return _gather(controller.turn_off_all_assigned_leds(backend) for controller in self.controllers)
+
+    def highlight_location(self, location_code, delay_ms=50):
+        # The owner lights the new LED; the others only turn off what they lit before.
+        owner = self._controller_for(location_code)
+        controllers = [
+            controller for controller in self.controllers
+            if controller is owner or controller.recent_leds
+        ]
+        return _gather(controller.highlight_location(location_code, delay_ms) for controller in controllers)
+
+    def _owners(self, locations):
+        return [
+            controller for controller in self.controllers
+            if any(controller.location_to_index(location) is not None for location in locations)
+        ]
+
+    def highlight_all(self, locations, stagger_ms=30):
+        locations = list(locations)
+        return _gather(controller.highlight_all(locations, stagger_ms) for controller in self._owners(locations))
+
+    def apply_frame(self, colors):
+        return _gather(controller.apply_frame(colors) for controller in self._owners(colors))
+
+
+def _scale(color, factor):
+    return tuple(int(round(channel * factor)) for channel in color)
+
+
+class Animation:
+    """
+    Something LedAnimator renders. frame(elapsed) returns {location: color}
+    for the LEDs it drives at `elapsed` seconds after it started. A color is
+    (r, g, b), None for the location's own highlight color, or a
+    (color, brightness) pair to dim either of those. Animations with a
+    duration end by themselves, others run until stop().
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.started_at = None
+        self.finished = threading.Event()
+        self._stopped = False
+
+    def frame(self, elapsed):
+        raise NotImplementedError
+
+    def is_done(self, elapsed):
+        return self._stopped or (self.duration is not None and elapsed >= self.duration)
+
+    def stop(self):
+        """End the animation; its LEDs are turned off on the next tick."""
+        self._stopped = True
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+
+class Blink(Animation):
+    def __init__(self, locations, color=None, period=1.0, duration=None):
+        super().__init__(duration)
+        self.locations = list(locations)
+        self.color = color
+        self.period = period
+
+    def frame(self, elapsed):
+        if (elapsed % self.period) >= self.period / 2:
+            return {}
+        return {location: self.color for location in self.locations}
+
+
+class Pulse(Animation):
+    """Fade between PULSE_FLOOR and full brightness, in PULSE_LEVELS steps so the strip is not rewritten every tick."""
+
+    def __init__(self, locations, color=None, period=2.0, duration=None):
+        super().__init__(duration)
+        self.locations = list(locations)
+        self.color = color
+        self.period = period
+
+    def frame(self, elapsed):
+        wave = (1 - math.cos(2 * math.pi * elapsed / self.period)) / 2
+        level = round(wave * (PULSE_LEVELS - 1)) / (PULSE_LEVELS - 1)
+        return {location: (self.color, PULSE_FLOOR + (1 - PULSE_FLOOR) * level) for location in self.locations}
+
+
+class PickSequence(Animation):
+    """
+    Walk a route of locations in order: the current stop blinks, the next
+    `preview` stops glow dimly and finished ones are off. advance() moves to
+    the next stop (e.g. when the picker confirms), or with `step_seconds`
+    the route advances by itself. Ends after the last stop.
+    """
+
+    def __init__(self, locations, color=None, preview=1, step_seconds=None, blink_period=0.6):
+        super().__init__()
+        self.locations = list(locations)
+        self.color = color
+        self.preview = preview
+        self.step_seconds = step_seconds
+        self.blink_period = blink_period
+        self.step = 0
+
+    def advance(self):
+        self.step += 1
+
+    def _current_step(self, elapsed):
+        if self.step_seconds:
+            return max(self.step, int(elapsed // self.step_seconds))
+        return self.step
+
+    def is_done(self, elapsed):
+        return super().is_done(elapsed) or self._current_step(elapsed) >= len(self.locations)
+
+    def frame(self, elapsed):
+        step = self._current_step(elapsed)
+        colors = {}
+        for location in self.locations[step + 1:step + 1 + self.preview]:
+            colors[location] = (self.color, PREVIEW_BRIGHTNESS)
+        if step < len(self.locations) and (elapsed % self.blink_period) < self.blink_period * 0.7:
+            colors[self.locations[step]] = self.color
+        return colors
+
+
+class LedAnimator:
+    """
+    Renders running animations on a fixed tick (tick_hz per second) from
+    its own thread. Each tick merges the animations' frames (later ones win
+    where they overlap) and hands only the LEDs that changed since the last
+    frame to the controller's apply_frame. Writes are not waited for; if the
+    serial link falls behind, the controller's queue keeps only the newest
+    color per LED.
+    """
+
+    def __init__(self, led_controller, tick_hz=ANIMATION_TICK_HZ):
+        self.led_controller = led_controller
+        self.tick = 1.0 / tick_hz
+        self.frames_sent = 0
+        self._animations = []
+        self._shown = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = None
+
+    def play(self, animation):
+        with self._cond:
+            if self._closing:
+                animation.finished.set()
+                return animation
+            animation.started_at = time.monotonic()
+            self._animations.append(animation)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="LedAnimator", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return animation
+
+    def blink(self, locations, color=None, period=1.0, duration=None):
+        return self.play(Blink(locations, color, period, duration))
+
+    def pulse(self, locations, color=None, period=2.0, duration=None):
+        return self.play(Pulse(locations, color, period, duration))
+
+    def pick_sequence(self, locations, color=None, preview=1, step_seconds=None):
+        return self.play(PickSequence(locations, color, preview, step_seconds))
+
+    def stop_all(self):
+        with self._cond:
+            for animation in self._animations:
+                animation.stop()
+            self._cond.notify()
+
+    def close(self):
+        """Stop every animation, turn its LEDs off and end the thread."""
+        with self._cond:
+            self._closing = True
+            for animation in self._animations:
+                animation.stop()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _color(self, location, color):
+        if color is None:
+            return self.led_controller._compute_color(location)
+        if len(color) == 2:
+            base, brightness = color
+            return _scale(base or self.led_controller._compute_color(location), brightness)
+        return color
+
+    def _render(self, now):
+        frame = {}
+        with self._cond:
+            for animation in list(self._animations):
+                elapsed = now - animation.started_at
+                if animation.is_done(elapsed):
+                    self._animations.remove(animation)
+                    animation.finished.set()
+                    continue
+                for location, color in animation.frame(elapsed).items():
+                    frame[location] = self._color(location, color)
+        return frame
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            with self._cond:
+                while not self._animations and not self._shown:
+                    if self._closing:
+                        return
+                    self._cond.wait()
+                    next_tick = time.monotonic()
+
+            frame = {location: color for location, color in self._render(time.monotonic()).items() if color != OFF}
+            changes = {location: color for location, color in frame.items() if self._shown.get(location) != color}
+            changes.update((location, OFF) for location in self._shown if location not in frame)
+            if changes:
+                try:
+                    self.led_controller.apply_frame(changes)
+                    self.frames_sent += 1
+                except Exception:
+                    logger.exception("LED animation frame failed")
+            self._shown = frame
+
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Running late: drop the missed ticks rather than rushing to catch up
+                next_tick = time.monotonic()
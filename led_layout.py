@@ -0,0 +1,120 @@
+import logging
+import string
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+WIRING_ORDERS = ("serpentine", "row_major")
+DEFAULT_ROWS = 4
+DEFAULT_COLUMNS = 26
+DEFAULT_WIRING = "serpentine"
+
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+
+
+@lru_cache(maxsize=1024)
+def canonical_location(location):
+    """
+    Reduce a location string to "<row><COLUMN>" the way the LED code always
+    has: the digits form the row and there must be exactly one letter, so
+    " 2b", "02B" and "2-B" all become "2B". Returns None for anything else
+    (bins, "N/A", blank).
+    """
+    text = str(location or "")
+    row_part = "".join(filter(str.isdigit, text))
+    col_part = "".join(filter(str.isalpha, text)).upper()
+    if not row_part or len(col_part) != 1:
+        return None
+    return f"{int(row_part)}{col_part}"
+
+
+class LedLayout:
+    """
+    Precomputed mapping for a rows x columns vial grid. Location codes are
+    "<row><column letter>" ("1A" is the first vial); slots number the vials
+    row by row, the order locations are handed out in; LED indexes follow how
+    the strip is wired, either row by row or serpentine (every other row runs
+    backwards).
+    """
+
+    def __init__(self, rows=DEFAULT_ROWS, columns=DEFAULT_COLUMNS, wiring=DEFAULT_WIRING):
+        if not 1 <= columns <= len(string.ascii_uppercase):
+            raise ValueError(f"Columns must be between 1 and {len(string.ascii_uppercase)}.")
+        if rows < 1:
+            raise ValueError("Rows must be at least 1.")
+        if wiring not in WIRING_ORDERS:
+            raise ValueError(f"Wiring must be one of: {', '.join(WIRING_ORDERS)}.")
+        self.rows = rows
+        self.columns = columns
+        self.wiring = wiring
+        self.size = rows * columns
+
+        self.locations = tuple(self._slot_code(slot) for slot in range(self.size))
+        self._led_for_location = {}
+        self._location_for_led = [None] * self.size
+        self._colors = {}
+        for slot, location in enumerate(self.locations):
+            row, column = divmod(slot, columns)
+            if wiring == "serpentine" and row % 2:
+                led = row * columns + (columns - 1 - column)
+            else:
+                led = slot
+            self._led_for_location[location] = led
+            self._location_for_led[led] = location
+            # Alternate colors by column so neighbouring vials are easy to tell apart
+            self._colors[location] = BLUE if column % 2 else GREEN
+
+    @classmethod
+    def parse_config(cls, config):
+        """Build the layout from the LAYOUT section of config.json; raises ValueError for bad values."""
+        layout_config = (config or {}).get("LAYOUT", {})
+        rows = str(layout_config.get("ROWS", "")).strip()
+        columns = str(layout_config.get("COLUMNS", "")).strip()
+        wiring = str(layout_config.get("WIRING", "")).strip().lower()
+        return cls(
+            rows=int(rows) if rows else DEFAULT_ROWS,
+            columns=int(columns) if columns else DEFAULT_COLUMNS,
+            wiring=wiring or DEFAULT_WIRING,
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        """Like parse_config, but falls back to the default grid when the settings are invalid."""
+        try:
+            return cls.parse_config(config)
+        except ValueError as e:
+            logger.warning("Invalid LED layout in config.json (%s); using the default grid.", e)
+            return cls()
+
+    def _slot_code(self, slot):
+        row, column = divmod(slot, self.columns)
+        return f"{row + 1}{string.ascii_uppercase[column]}"
+
+    def location_for_slot(self, slot):
+        """Location code for the slot-th vial; slots past the grid keep counting row by row."""
+        if slot < self.size:
+            return self.locations[slot]
+        return self._slot_code(slot)
+
+    def led_index(self, location):
+        """LED index for a location code, or None when it is not on the grid."""
+        led = self._led_for_location.get(location)
+        if led is None and location:
+            led = self._led_for_location.get(canonical_location(location))
+        return led
+
+    def location_for_led(self, index):
+        if 0 <= index < self.size:
+            return self._location_for_led[index]
+        return None
+
+    def color(self, location):
+        """Highlight color for a location, or None when it is not on the grid."""
+        color = self._colors.get(location)
+        if color is None and location:
+            color = self._colors.get(canonical_location(location))
+        return color
+
+    def is_led_location(self, location):
+        return self.led_index(location) is not None
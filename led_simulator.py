@@ -0,0 +1,229 @@
+import array
+import fcntl
+import os
+import termios
+import threading
+import time
+import tty
+import logging
+
+from ledSerial import FRAME_OP_SET, FRAME_SYNC, crc8
+
+logger = logging.getLogger(__name__)
+
+FULL_CAPABILITIES = ("BATCH=32", "CLEAR", "FILL", "SETN")
+
+
+class SimulatedCommand:
+    __slots__ = ("arrived_at", "name", "pixels")
+
+    def __init__(self, arrived_at, name, pixels):
+        self.arrived_at = arrived_at
+        self.name = name
+        self.pixels = pixels
+
+
+class LedSimulator:
+    """
+    Stand-in for the Arduino LED controller on a Linux pseudo-terminal.
+    Point LedController at `port` and it talks to this object instead of
+    hardware. Incoming bytes are held back as if they had crossed a serial
+    line at `baudrate` (10 bits per byte), then parsed as SET lines, the
+    CLEAR/FILL/SETN commands or binary SET frames. Each command is recorded
+    with the monotonic time its last byte would have arrived.
+
+    With `capabilities=None` the simulator behaves like old firmware and
+    ignores the CAPS probe.
+    """
+
+    def __init__(self, num_leds=104, baudrate=9600, capabilities=FULL_CAPABILITIES):
+        self.num_leds = num_leds
+        self.baudrate = baudrate
+        self.capabilities = capabilities
+        self.pixels = [(0, 0, 0)] * num_leds
+        self.commands = []
+        self.errors = []
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._buffer = bytearray()
+        self._wire_free_at = 0.0
+        self._chunks = 0
+        self._processing = False
+        self._changed = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, name="LedSimulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        for fd in (self._slave, self._master):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset(self):
+        """Forget recorded commands; the LED state is kept."""
+        with self._changed:
+            self.commands = []
+            self.errors = []
+
+    def wait_for(self, predicate, timeout=30.0):
+        """
+        Block until `predicate(pixels)` holds and return the arrival time of
+        the command that made it true, or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not predicate(self.pixels):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+            return self.commands[-1].arrived_at if self.commands else time.monotonic()
+
+    def wait_idle(self, quiet=0.2, timeout=60.0):
+        """
+        Block until everything written to the pty so far has been read and
+        parsed, and nothing else arrived for `quiet` seconds. Returns False on
+        timeout.
+        """
+        deadline = time.monotonic() + timeout
+        previous = None
+        while time.monotonic() < deadline:
+            with self._changed:
+                busy = self._processing or self._buffer or self._unread()
+                state = (self._chunks, time.monotonic() >= self._wire_free_at)
+            if not busy and state == previous and state[1]:
+                return True
+            previous = None if busy else state
+            time.sleep(quiet)
+        return False
+
+    def _unread(self):
+        count = array.array("i", [0])
+        fcntl.ioctl(self._master, termios.FIONREAD, count)
+        return count[0]
+
+    def _read_loop(self):
+        byte_time = 10.0 / self.baudrate
+        while self._running:
+            try:
+                chunk = os.read(self._master, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            with self._changed:
+                self._processing = True
+            # The chunk's bytes cross the wire one after another, behind
+            # whatever was still in flight from earlier writes.
+            start = max(time.monotonic(), self._wire_free_at)
+            self._wire_free_at = start + len(chunk) * byte_time
+            carried = len(self._buffer)
+            self._buffer += chunk
+            used = 0
+            while True:
+                parsed = self._parse_one()
+                if parsed is None:
+                    break
+                length, name, pixels = parsed
+                used += length
+                arrived_at = start + max(used - carried, 0) * byte_time
+                delay = arrived_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._apply(arrived_at, name, pixels)
+            with self._changed:
+                self._processing = False
+                self._chunks += 1
+
+    def _parse_one(self):
+        """Pop one complete command off the buffer: (bytes used, name, pixels) or None."""
+        buffer = self._buffer
+        if not buffer:
+            return None
+        if buffer.startswith(FRAME_SYNC):
+            if len(buffer) < 5:
+                return None
+            opcode = buffer[2]
+            length = int.from_bytes(buffer[3:5], "big")
+            total = 5 + length + 1
+            if len(buffer) < total:
+                return None
+            body = bytes(buffer[2:5 + length])
+            checksum = buffer[total - 1]
+            del buffer[:total]
+            if crc8(body) != checksum or opcode != FRAME_OP_SET or length % 5:
+                self.errors.append(("bad frame", body))
+                return total, "FRAME?", []
+            payload = body[3:]
+            pixels = [
+                (int.from_bytes(payload[i:i + 2], "big"), tuple(payload[i + 2:i + 5]))
+                for i in range(0, len(payload), 5)
+            ]
+            return total, "FRAME", pixels
+        newline = buffer.find(b"\n")
+        if newline < 0:
+            return None
+        line = bytes(buffer[:newline]).decode("ascii", errors="replace").strip()
+        del buffer[:newline + 1]
+        return newline + 1, *self._parse_line(line)
+
+    def _parse_line(self, line):
+        parts = line.split()
+        if not parts:
+            return "", []
+        name, args = parts[0].upper(), parts[1:]
+        try:
+            values = [int(arg) for arg in args]
+        except ValueError:
+            self.errors.append(("bad arguments", line))
+            return name, []
+        if name == "CAPS":
+            if self.capabilities is not None:
+                os.write(self._master, ("CAPS " + " ".join(self.capabilities) + "\n").encode("ascii"))
+            return name, []
+        if name == "SET" and len(values) == 4:
+            return name, [(values[0], tuple(values[1:]))]
+        if self.capabilities is not None:
+            if name == "CLEAR":
+                return name, [(index, (0, 0, 0)) for index in range(self.num_leds)]
+            if name == "FILL" and len(values) == 5:
+                start, count, color = values[0], values[1], tuple(values[2:])
+                return name, [(index, color) for index in range(start, start + count)]
+            if name == "SETN" and len(values) >= 4:
+                color = tuple(values[:3])
+                return name, [(index, color) for index in values[3:]]
+        self.errors.append(("unknown command", line))
+        return name, []
+
+    def _apply(self, arrived_at, name, pixels):
+        with self._changed:
+            for index, color in pixels:
+                if 0 <= index < self.num_leds:
+                    self.pixels[index] = color
+                else:
+                    self.errors.append(("index out of range", index))
+            if name:
+                self.commands.append(SimulatedCommand(arrived_at, name, len(pixels)))
+            self._changed.notify_all()
@@ -6,11 +6,12 @@ from backend import Backend
 from digikey_api_local import Digikey_API_Call
 from file_initializer import FileInitializer
 from frontend import MainWindow
+from led_layout import LedLayout
 
 try:
-    from ledSerial import LedController
+    from ledSerial import LedControllerGroup
 except Exception:
-    LedController = None
+    LedControllerGroup = None
 
 
 class NullLedController:
@@ -35,6 +36,9 @@ class NullLedController:
     def is_connected(self):
         return False
 
+    def close(self):
+        return None
+
     def get_status(self):
         return {
             "connected": False,
@@ -46,24 +50,32 @@ class NullLedController:
 def main():
     initializer = FileInitializer()
     created_config = initializer.initialize_files()
+    # One layout instance for the backend and every LED controller
+    led_layout = LedLayout.from_config(initializer.load_config())
 
     app = QApplication(sys.argv)
     digikey_api = Digikey_API_Call(show_errors=False)
     led_controller = NullLedController()
-    if LedController is not None:
+    if LedControllerGroup is not None:
         try:
-            led_controller = LedController(show_errors=False)
+            led_controller = LedControllerGroup(show_errors=False, connect=False, layout=led_layout)
         except Exception:
             led_controller = NullLedController()
 
-    backend = Backend(led_controller)
+    backend = Backend(led_controller, led_layout=led_layout)
 
     window = MainWindow(backend, digikey_api, initializer)
     window.show()
+    if hasattr(led_controller, "connect_in_background"):
+        led_controller.connect_in_background()
     if created_config:
         window.open_settings_dialog()
 
-    return app.exec()
+    exit_code = app.exec()
+    backend.close()
+    digikey_api.close()
+    led_controller.close()
+    return exit_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from image_cache import resolve_image_cache_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_HOURS = 24
+
+
+def cache_key(part_number):
+    """
+    Key a part number is cached under: surrounding whitespace stripped and
+    upper-cased, so " lm358n" and "LM358N" share one entry. Nothing else is
+    changed: unlike Backend.normalize_part_number, suffixes such as -ND are kept.
+    """
+    return str(part_number or "").strip().upper()
+
+
+def _configured_ttl_seconds():
+    config_path = os.path.join(os.path.dirname(__file__), "Databases", "config.json")
+    try:
+        with open(config_path, "r") as file:
+            ttl_hours = str(json.load(file).get("API", {}).get("PRODUCT_CACHE_TTL_HOURS", "")).strip()
+        return float(ttl_hours) * 3600 if ttl_hours else DEFAULT_TTL_HOURS * 3600
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        return DEFAULT_TTL_HOURS * 3600
+
+
+@dataclass
+class ProductCacheEntry:
+    part_number: str
+    component: dict | None   # None records that DigiKey had no match
+    fetched_at: float
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class ProductCache:
+    """
+    DigiKey keyword-search results kept in the product_cache table of
+    image_cache.db (created by FileInitializer), keyed by cache_key(). Entries
+    older than `ttl_seconds` are still returned, marked stale, so the caller
+    can answer at once and refresh in the background.
+
+    Used from the bulk lookup workers as well as the UI thread, so the
+    connection is shared under a lock.
+    """
+
+    def __init__(self, db_file=None, ttl_seconds=None):
+        self.db_file = db_file or resolve_image_cache_path()
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else _configured_ttl_seconds()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+
+    def lookup(self, part_number):
+        """Return (entry, fresh); entry is None on a miss. Updates the hit/miss counters."""
+        key = cache_key(part_number)
+        row = None
+        with self._lock:
+            if key and self.conn:
+                try:
+                    row = self.conn.execute(
+                        "SELECT component, fetched_at FROM product_cache WHERE part_number = ?",
+                        (key,),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning("Product cache read failed: %s", e)
+            if row is None:
+                self.misses += 1
+                return None, False
+            entry = ProductCacheEntry(part_number=key, component=json.loads(row[0]), fetched_at=row[1])
+            fresh = entry.age() < self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry, fresh
+
+    def store(self, part_number, component):
+        key = cache_key(part_number)
+        if not key:
+            return
+        with self._lock:
+            if not self.conn:
+                return
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO product_cache (part_number, component, fetched_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(component), time.time()),
+                )
+                self.conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Product cache write failed: %s", e)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,37 @@
+from catalogue_index import LocationIndex
+
+
+def location_for_slot(slot):
+    return f"A{slot + 1}"
+
+
+def component(location):
+    return {"part_info": {"location": location}}
+
+
+def test_reservations_survive_rebuild():
+    index = LocationIndex(location_for_slot, 6)
+    components = [component("A1")]
+    index.rebuild(components)
+    reserved = index.reserve(2)
+    assert reserved == ["A2", "A3"]
+
+    # A reload (settings or storage engine change) during the batch check-in
+    components.append(component("A2"))
+    index.rebuild(components)
+
+    assert index.reserved_locations() == {"A3"}
+    assert index.allocate() == "A4"
+
+
+def test_reservations_carry_over_to_new_layout():
+    index = LocationIndex(location_for_slot, 6)
+    reserved = index.reserve(3)
+
+    smaller = LocationIndex(location_for_slot, 2)
+    smaller.rebuild([], index.reserved_locations())
+
+    assert smaller.reserved_locations() == {"A1", "A2"}
+    assert smaller.allocate() is None
+    smaller.release(reserved)
+    assert smaller.allocate() == "A1"